@@ -0,0 +1,105 @@
+"""
+Times how many entity updates can be done each second when many slimes walk around a maze and bump into its hedges
+Compares the original collisions, which create a feet rect for each axis and check it against each hedge rect in turn, to the current collisions
+Run from the root of the project with: python -m benchmarks.collisions
+"""
+import copy
+import random
+import time
+import types
+
+from benchmarks.pathfinding import create_maze
+from scripts.entities import Entity
+from scripts.maze import VOID
+
+# This is the maze resolution and the number of hedges removed from it
+RESOLUTION = (101, 101, 400)
+# This is how many slimes walk around the maze, how many frames they walk for and how many times this is repeated, with the fastest time being kept
+SLIME_COUNT = 1000
+FRAMES = 200
+REPEATS = 5
+# This is the chance each frame that a slime changes which way it is walking
+TURN_CHANCE = 0.05
+
+def update_original(entity):
+    """
+    The original entity update, which creates the feet rect of the entity for each axis and collides it with each of the rects of the hedges around it
+    """
+    x_displacement, y_displacement = entity.get_displacement()
+
+    entity.pos[0] += x_displacement
+    feet_rect = entity.get_feet_rect()
+    loc = entity.game.maze.get_loc(feet_rect.center)
+    neighbours = entity.game.maze.collision_rects[entity.game.maze.get_index(loc)] if entity.game.maze.get_code(loc) != VOID else ()
+    for rect in neighbours:
+        if feet_rect.colliderect(rect):
+            if x_displacement > 0:
+                feet_rect.right = rect.left
+            else:
+                feet_rect.left = rect.right
+            entity.pos[0] = feet_rect.x
+
+    entity.pos[1] += y_displacement
+    feet_rect = entity.get_feet_rect()
+    for rect in neighbours:
+        if feet_rect.colliderect(rect):
+            if y_displacement > 0:
+                feet_rect.bottom = rect.top
+            else:
+                feet_rect.top = rect.bottom
+            entity.pos[1] = feet_rect.bottom - entity.size[1]
+    entity.update_facing()
+
+def get_turns(rng):
+    """
+    Returns the directions that each slime walks in on each frame, so both kinds of collisions are given the same walks
+    """
+    turns = []
+    moving = [None] * SLIME_COUNT
+    for frame in range(FRAMES):
+        for i in range(SLIME_COUNT):
+            if moving[i] == None or rng.random() < TURN_CHANCE:
+                moving[i] = {'left': rng.random() < 0.5, 'right': rng.random() < 0.5, 'up': rng.random() < 0.5, 'down': rng.random() < 0.5}
+        turns.append(list(moving))
+    return turns
+
+def time_walk(slimes, turns, update):
+    """
+    Returns how many seconds it takes to update every slime on every frame, along with the positions of the slimes after each frame
+    """
+    positions = []
+    seconds = 0
+    for moving in turns:
+        for slime, slime_moving in zip(slimes, moving):
+            slime.moving = slime_moving
+        start_time = time.perf_counter()
+        for slime in slimes:
+            update(slime)
+        seconds += time.perf_counter() - start_time
+        positions.append([tuple(slime.pos) for slime in slimes])
+    return seconds, positions
+
+if __name__ == "__main__":
+    maze = create_maze(RESOLUTION[:2], RESOLUTION[2], 0)
+    maze.build_collision_rects()
+    game = types.SimpleNamespace(maze=maze)
+
+    rng = random.Random(0)
+    slimes = [Entity(game, maze.get_random_loc("path", rng=rng), (16, 16), rng.uniform(1, 2), 30) for i in range(SLIME_COUNT)]
+    for slime in slimes:
+        slime.set_time_step(1 / 60)
+    turns = get_turns(rng)
+
+    original_time = current_time = float('inf')
+    for i in range(REPEATS):
+        seconds, original_positions = time_walk(copy.deepcopy(slimes), turns, update_original)
+        original_time = min(original_time, seconds)
+        seconds, current_positions = time_walk(copy.deepcopy(slimes), turns, Entity.update)
+        current_time = min(current_time, seconds)
+        # Both kinds of collisions should always leave the slimes in the same places
+        assert current_positions == original_positions
+
+    updates = SLIME_COUNT * FRAMES
+    print(f"{'collisions':>12}{'updates/s':>12}{'speedup':>12}")
+    print(f"{'original':>12}{updates / original_time:>12.0f}{1:>11.1f}x")
+    print(f"{'current':>12}{updates / current_time:>12.0f}{original_time / current_time:>11.1f}x")
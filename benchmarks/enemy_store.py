@@ -0,0 +1,128 @@
+"""
+Times how many enemy movement steps can be done each second when many slimes walk, get knocked back and get stunned
+Compares the per-enemy update, which works out the displacement and timers of each enemy in turn, to the enemy store, which works them out for all the enemies together
+Deciding where to go and colliding with the hedges are left out, as the enemy store still does those for each enemy
+Run from the root of the project with: python -m benchmarks.enemy_store
+"""
+import random
+import time
+import types
+
+from benchmarks.pathfinding import create_maze
+from scripts.entities import Enemy, STUN_TIME
+from scripts.enemy_store import EnemyStore, BatchedEnemy
+from scripts.spatial_hash import SpatialHash
+
+# This is how many slimes are moved, how many frames they are moved for and how many times this is repeated, with the fastest time being kept
+SLIME_COUNT = 1000
+FRAMES = 200
+REPEATS = 5
+# These are the chances each frame that a slime changes which way it is walking and that it is hit, which knocks it back and stuns it
+TURN_CHANCE = 0.05
+HIT_CHANCE = 0.002
+
+def create_game(maze):
+    """
+    Returns just enough of a game for the slimes to be created and moved
+    """
+    game = types.SimpleNamespace(maze=maze)
+    game.animations = {'red_slime': {'idle': None, 'running': None, 'attack': None, 'death': None}}
+    game.enemy_hash = SpatialHash(maze.tile_size)
+    game.enemy_store = EnemyStore(game)
+    return game
+
+def get_frames(rng):
+    """
+    Returns what each slime does on each frame, so both kinds of update are given the same frames
+    Each frame has the directions the slimes are walking in with the displacements to the points they are walking towards, and the slimes that are hit along with the point they are knocked back from and the speed of their knockback
+    """
+    frames = []
+    moving = [None] * SLIME_COUNT
+    for frame in range(FRAMES):
+        for i in range(SLIME_COUNT):
+            if moving[i] == None or rng.random() < TURN_CHANCE:
+                moving[i] = ({'left': rng.random() < 0.5, 'right': rng.random() < 0.5, 'up': rng.random() < 0.5, 'down': rng.random() < 0.5}, (rng.uniform(-32, 32), rng.uniform(-32, 32)))
+        hits = [(i, (rng.uniform(-100, 100), rng.uniform(-100, 100)), rng.uniform(2.5, 3.5)) for i in range(SLIME_COUNT) if rng.random() < HIT_CHANCE]
+        frames.append((list(moving), hits))
+    return frames
+
+def update_enemies(enemies):
+    """
+    The per-enemy update, which counts down the stun timer of each stunned enemy and moves each enemy by its displacement
+    """
+    for enemy in enemies:
+        if enemy.stunned_timer > 0:
+            if enemy.knockback_timer <= 0:
+                enemy.stunned_timer -= enemy.dt
+        x_displacement, y_displacement = enemy.get_displacement()
+        enemy.pos[0] += x_displacement
+        enemy.pos[1] += y_displacement
+
+def update_store(store, enemies):
+    """
+    The enemy store update, which copies where each enemy has decided to go into the arrays and then moves all of them together
+    """
+    resting = []
+    move_xs, move_ys, slows, target_xs, target_ys = store.move_xs, store.move_ys, store.slows, store.target_xs, store.target_ys
+    store.dts[:] = store.multis[:] = [0] * len(store.enemies)
+    for enemy in enemies:
+        index = enemy.store_index
+        store.dts[index], store.multis[index] = enemy.dt, enemy.multi
+        if store.stunned_timers[index] > 0:
+            resting.append(index)
+        moving = enemy.moving
+        move_xs[index] = moving['right'] - moving['left']
+        move_ys[index] = moving['down'] - moving['up']
+        slows[index] = 0.75 if "attack" in enemy.animation.current_animation else 1
+        target_xs[index], target_ys[index] = abs(enemy.target_displacement[0]), abs(enemy.target_displacement[1])
+    x_displacements, y_displacements = store.get_displacements(resting)
+    store.move(0, x_displacements)
+    store.move(1, y_displacements)
+
+def time_frames(enemies, frames, update):
+    """
+    Returns how many seconds it takes to update every slime on every frame, along with the positions and timers of the slimes after each frame
+    """
+    states = []
+    seconds = 0
+    for moving, hits in frames:
+        for enemy, (enemy_moving, target_displacement) in zip(enemies, moving):
+            enemy.moving = enemy_moving
+            enemy.target_displacement = target_displacement
+        for i, point, speed in hits:
+            enemies[i].knockback(point, speed)
+            enemies[i].stunned_timer = STUN_TIME
+        start_time = time.perf_counter()
+        update()
+        seconds += time.perf_counter() - start_time
+        states.append([(tuple(enemy.pos), enemy.knockback_timer, enemy.stunned_timer) for enemy in enemies])
+    return seconds, states
+
+if __name__ == "__main__":
+    maze = create_maze((101, 101), 400, 0)
+    rng = random.Random(0)
+    slimes = [(maze.get_random_loc("path", rng=rng), rng.uniform(1, 2)) for i in range(SLIME_COUNT)]
+    frames = get_frames(rng)
+
+    enemy_time = store_time = float('inf')
+    for i in range(REPEATS):
+        game = create_game(maze)
+        enemies = [Enemy(game, loc, (16, 16), speed, 30, 'red') for loc, speed in slimes]
+        batched_enemies = [BatchedEnemy(game, loc, (16, 16), speed, 30, 'red') for loc, speed in slimes]
+        for enemy in enemies + batched_enemies:
+            enemy.set_time_step(1 / 60)
+        # Some of the slimes are attacking, which slows them down
+        for j in range(0, SLIME_COUNT, 10):
+            enemies[j].animation.current_animation = batched_enemies[j].animation.current_animation = "attack"
+
+        seconds, enemy_states = time_frames(enemies, frames, lambda: update_enemies(enemies))
+        enemy_time = min(enemy_time, seconds)
+        seconds, store_states = time_frames(batched_enemies, frames, lambda: update_store(game.enemy_store, batched_enemies))
+        store_time = min(store_time, seconds)
+        # Both kinds of update should always leave the slimes in the same places with the same timers
+        assert store_states == enemy_states
+
+    updates = SLIME_COUNT * FRAMES
+    print(f"{'update':>12}{'updates/s':>12}{'speedup':>12}")
+    print(f"{'per enemy':>12}{updates / enemy_time:>12.0f}{1:>11.1f}x")
+    print(f"{'store':>12}{updates / store_time:>12.0f}{enemy_time / store_time:>11.1f}x")
@@ -0,0 +1,59 @@
+"""
+Times how long it takes to keep finding the paths of many slimes to the player while the player walks along the long corridors of perfect mazes
+Compares starting a new A* search for every path to repairing the last search with the incremental pathfinder
+Run from the root of the project with: python -m benchmarks.incremental_pathfinding
+"""
+import random
+import time
+
+from benchmarks.pathfinding import create_maze
+from scripts.pathfinding import AStar, IncrementalPathfinder, find_path
+
+# These are the maze resolutions. No hedges are removed so the only path between two tiles is along the corridors
+RESOLUTIONS = ((51, 51), (101, 101), (151, 151))
+# This is how many slimes chase the player on each maze and how many tiles the player walks
+SLIME_COUNT = 10
+PLAYER_STEPS = 100
+# This is how many tiles the player walks for each tile the slimes walk
+SLIME_SLOWNESS = 2
+
+def get_player_route(maze, rng):
+    """
+    Returns a route for the player to walk, which is the longest of a few paths between random tiles
+    """
+    routes = [find_path(maze, maze.get_random_loc("path", rng=rng), maze.get_random_loc("path", rng=rng)) for i in range(10)]
+    return max(routes, key=len)[:PLAYER_STEPS]
+
+def time_chase(pathfinder, route, starts):
+    """
+    Returns how many seconds a pathfinder takes to find the path of every slime each time the player moves, along with the lengths of all the paths
+    The slimes move along their paths as the player walks, so the starting locations and destinations only change by a tile at a time
+    """
+    slimes = list(starts)
+    lengths = []
+    seconds = 0
+    for step, destination in enumerate(route):
+        for i, slime in enumerate(slimes):
+            start_time = time.perf_counter()
+            path = pathfinder.get_path(slime, destination)
+            seconds += time.perf_counter() - start_time
+            lengths.append(len(path))
+            if step % SLIME_SLOWNESS == 0 and len(path) != 0:
+                slimes[i] = path[0]
+    return seconds, lengths
+
+if __name__ == "__main__":
+    print(f"{'resolution':>12}{'replans':>12}{'A*':>12}{'incremental':>12}{'speedup':>12}")
+    for resolution in RESOLUTIONS:
+        maze = create_maze(resolution, 0, 0)
+        rng = random.Random(0)
+        route = get_player_route(maze, rng)
+        starts = [maze.get_random_loc("path", rng=rng) for i in range(SLIME_COUNT)]
+
+        a_star_time, a_star_lengths = time_chase(AStar(maze), route, starts)
+        incremental_time, incremental_lengths = time_chase(IncrementalPathfinder(maze), route, starts)
+        # Both pathfinders should always find paths of the same length
+        assert incremental_lengths == a_star_lengths
+
+        label = f"{resolution[0]}x{resolution[1]}"
+        print(f"{label:>12}{len(a_star_lengths):>12}{a_star_time:>11.3f}s{incremental_time:>11.3f}s{a_star_time / incremental_time:>11.1f}x")
@@ -0,0 +1,32 @@
+"""
+Times how long each maze generation algorithm takes to carve mazes of different sizes
+Run from the root of the project with: python -m benchmarks.maze_algorithms
+"""
+import random
+import time
+
+from scripts.maze import Maze, MAZE_ALGORITHMS, fill_hedges, carve_maze
+
+# These are the maze resolutions that each algorithm is timed on
+RESOLUTIONS = ((25, 25), (101, 101), (501, 501), (1001, 1001))
+# This is how many times each algorithm is timed on each resolution, where the fastest time is used
+REPEATS = 3
+
+def time_algorithm(algorithm, resolution, seed):
+    """
+    Returns how many seconds an algorithm takes to carve a maze of a given resolution
+    """
+    maze = Maze(None, 32, resolution)
+    rng = random.Random(seed)
+    fill_hedges(maze)
+
+    start_time = time.perf_counter()
+    carve_maze(maze, rng, (1, 1), algorithm)
+    return time.perf_counter() - start_time
+
+if __name__ == "__main__":
+    print(f"{'resolution':>12}" + "".join(f"{algorithm:>12}" for algorithm in MAZE_ALGORITHMS))
+    for resolution in RESOLUTIONS:
+        times = [min(time_algorithm(algorithm, resolution, seed) for seed in range(REPEATS)) for algorithm in MAZE_ALGORITHMS]
+        label = f"{resolution[0]}x{resolution[1]}"
+        print(f"{label:>12}" + "".join(f"{seconds:>11.3f}s" for seconds in times))
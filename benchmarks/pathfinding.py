@@ -0,0 +1,117 @@
+"""
+Times how long it takes to find the paths of many slimes to the player on large mazes
+Compares the original set based A* search to each of the pathfinders that the game can use
+Also compares how many locations the A* search and the junction graph search through
+Run from the root of the project with: python -m benchmarks.pathfinding
+"""
+import random
+import time
+
+from scripts.maze import Maze, fill_hedges, carve_maze, remove_hedges, add_border
+from scripts.pathfinding import PATHFINDERS, AStar, JunctionGraph
+
+# These are the maze resolutions and the number of hedges removed from each maze, which is shown after the resolution in the results
+RESOLUTIONS = ((25, 25, 25), (101, 101, 400), (251, 251, 2500), (151, 151, 0))
+# This is how many slimes find a path to the player on each maze
+SLIME_COUNT = 50
+
+def find_path_with_set(maze, starting_loc, destination):
+    """
+    The original A* search, which keeps the frontier in a set and finds the node with the lowest cost by checking every node
+    Each node is formatted as [tile location, parent tile location, cost, Manhattan distance + cost]
+    """
+    frontier = {(starting_loc, None, 0, 0)}
+    explored_tiles = set()
+
+    while True:
+        if len(frontier) == 0:
+            return None
+
+        node = min(frontier, key=lambda node: node[3])
+        frontier.remove(node)
+        explored_tiles.add(node[0])
+
+        if node[0] == destination:
+            break
+        else:
+            for neighbour in maze.get_neighbour_locs(node[0], diagonals=False):
+                if maze.is_path(neighbour) and neighbour not in explored_tiles:
+                    frontier.add((neighbour, node, node[2] + 1, node[2] + 1 + abs(neighbour[0] - destination[0]) + abs(neighbour[1] - destination[1])))
+
+    shortest_path = []
+    while node[1] != None:
+        shortest_path.insert(0, node[0])
+        node = node[1]
+    return shortest_path
+
+def create_maze(resolution, removed_tiles, seed):
+    """
+    Generates a maze without any images so it can be used outside of the game
+    """
+    maze = Maze(None, 32, resolution)
+    rng = random.Random(seed)
+    fill_hedges(maze)
+    carve_maze(maze, rng, (1, 1))
+    remove_hedges(maze, removed_tiles, rng, (0, 0), (resolution[0] - 1, resolution[1] - 1))
+    add_border(maze)
+    maze.index_locations()
+    return maze
+
+def time_function(function, starts, destination):
+    """
+    Returns how many seconds a path finding function takes to find a path from every starting location, along with the lengths of the paths
+    """
+    start_time = time.perf_counter()
+    lengths = [len(function(start, destination)) for start in starts]
+    return time.perf_counter() - start_time, lengths
+
+def count_searched(pathfinder, expanding_object, function_name, starts, destination):
+    """
+    Returns how many locations a pathfinder searches through to find a path from every starting location
+    This is found by counting the calls to the function of an object that the pathfinder uses to expand each location
+    """
+    searched = [0]
+    function = getattr(expanding_object, function_name)
+    def counted_function(*args, **kwargs):
+        searched[0] += 1
+        return function(*args, **kwargs)
+
+    setattr(expanding_object, function_name, counted_function)
+    for start in starts:
+        pathfinder.get_path(start, destination)
+    delattr(expanding_object, function_name)
+    return searched[0]
+
+if __name__ == "__main__":
+    print(f"{'resolution':>16}{'set A*':>16}" + "".join(f"{name:>16}" for name in PATHFINDERS))
+    for width, height, removed_tiles in RESOLUTIONS:
+        maze = create_maze((width, height), removed_tiles, 0)
+        rng = random.Random(0)
+        destination = maze.get_random_loc("path", rng=rng)
+        starts = [maze.get_random_loc("path", rng=rng) for i in range(SLIME_COUNT)]
+
+        set_time, set_lengths = time_function(lambda start, destination: find_path_with_set(maze, start, destination), starts, destination)
+        times = []
+        for pathfinder in PATHFINDERS.values():
+            pathfinder_time, lengths = time_function(pathfinder(maze).get_path, starts, destination)
+            # Every pathfinder should always find paths of the same length
+            assert lengths == set_lengths
+            times.append(pathfinder_time)
+
+        label = f"{width}x{height} -{removed_tiles}"
+        print(f"{label:>16}{set_time:>15.3f}s" + "".join(f"{pathfinder_time:>15.3f}s" for pathfinder_time in times))
+
+    print()
+    print(f"{'resolution':>16}{'a_star':>16}{'junction_graph':>16}")
+    for width, height, removed_tiles in RESOLUTIONS:
+        maze = create_maze((width, height), removed_tiles, 0)
+        rng = random.Random(0)
+        destination = maze.get_random_loc("path", rng=rng)
+        starts = [maze.get_random_loc("path", rng=rng) for i in range(SLIME_COUNT)]
+
+        # The A* search expands each tile by finding its neighbours while the junction graph expands each location by finding the moves from it
+        junction_graph = JunctionGraph(maze)
+        a_star_searched = count_searched(AStar(maze), maze, "get_neighbour_locs", starts, destination)
+        junction_graph_searched = count_searched(junction_graph, junction_graph, "get_moves", starts, destination)
+        label = f"{width}x{height} -{removed_tiles}"
+        print(f"{label:>16}{a_star_searched:>16}{junction_graph_searched:>16}")
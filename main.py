@@ -4,32 +4,34 @@ from scripts.game import Game
 from scripts.menus import MainMenu, OptionsMenu, CreditsMenu, LeaderboardMenu, SignUpMenu, LoginMenu, SelectionMenu
 from scripts.utils import create_window, load_data
 
-pygame.init()
-pygame.mixer.set_num_channels(32)
+# The game only runs in the main process, not in the worker processes that can be used to find paths
+if __name__ == "__main__":
+    pygame.init()
+    pygame.mixer.set_num_channels(32)
 
-# Load the options
-data = load_data()
-monitor = pygame.display.Info()
-current_screen = 'main_menu' if 'logged_in' in data else 'selection'
-res = data['options']['res'] if data['options']['res'] != None else (monitor.current_w, monitor.current_h)
-fps = data['options']['fps']
+    # Load the options
+    data = load_data()
+    monitor = pygame.display.Info()
+    current_screen = 'main_menu' if 'logged_in' in data else 'selection'
+    res = data['options']['res'] if data['options']['res'] != None else (monitor.current_w, monitor.current_h)
+    fps = data['options']['fps']
 
-screens = {
-    'selection': SelectionMenu, 'signup': SignUpMenu, 'login': LoginMenu, 
-    'main_menu': MainMenu, 'game': Game, 'options_menu': OptionsMenu, 'leaderboard': LeaderboardMenu, 'credits_menu': CreditsMenu
-    }
+    screens = {
+        'selection': SelectionMenu, 'signup': SignUpMenu, 'login': LoginMenu, 
+        'main_menu': MainMenu, 'game': Game, 'options_menu': OptionsMenu, 'leaderboard': LeaderboardMenu, 'credits_menu': CreditsMenu
+        }
 
-running = True
-window = create_window(res)
+    running = True
+    window = create_window(res)
 
-while running:
-    # Creates an instance of the current screen
-    screen = screens[current_screen](window, fps)
-    # Calls the run method of the screen and takes the return value which is the next screen as current_screen
-    current_screen = screen.run()
-    window = screen.window
-    fps = screen.fps
-    if current_screen not in screens:
-        running = False
+    while running:
+        # Creates an instance of the current screen
+        screen = screens[current_screen](window, fps)
+        # Calls the run method of the screen and takes the return value which is the next screen as current_screen
+        current_screen = screen.run()
+        window = screen.window
+        fps = screen.fps
+        if current_screen not in screens:
+            running = False
 
-pygame.quit()
\ No newline at end of file
+    pygame.quit()
\ No newline at end of file
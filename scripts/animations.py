@@ -38,7 +38,7 @@ class AnimationHandler:
         Adds the change in time to the animation timer and changes the frame if needed for all animations
         """
         for animation in AnimationHandler.animations:
-            if animation.current_animation == None or animation.done == True: continue 
+            if animation.current_animation == None or animation.done == True or animation.paused: continue 
             # Adds the change in time to the timer
             animation.timer += dt
             # Changes the frame to the next frame if the timer has reached the duration of the frame and resets the timer
@@ -73,6 +73,8 @@ class AnimationManager:
         self.animation_library = {}
         self.flip = False
         self.done = False
+        # Paused animations stay on their current frame
+        self.paused = False
 
     def change_animation_library(self, animation_library):
         """
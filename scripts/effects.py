@@ -269,8 +269,9 @@ class Spike:
         # Decreases the speed of the spike over time
         self.speed -= self.game.dt * 3
 
+        # Only checks the enemies in the tiles around the spike
         rect = self.get_rect()
-        for enemy in self.game.enemies:
+        for enemy in self.game.enemy_hash.query(rect):
             if rect.colliderect(enemy.get_rect()):
                 enemy.hit(self.color_id)
 
@@ -0,0 +1,271 @@
+import random
+import math
+
+import pygame
+
+from collections import OrderedDict
+
+from scripts.maze import Maze, TILE_TYPES, NEIGHBOUR_OFFSETS, DIAGONAL_OFFSETS, HEDGE, fill_hedges, carve_maze, remove_hedges, place_flowers, add_border
+
+# This is the width and height in tiles of each chunk of an endless maze. It must be odd so the chunk has a hedge wall on each edge
+ENDLESS_CHUNK_SIZE = 15
+# This is how many hedges are removed and how many flowers are placed in each chunk
+ENDLESS_REMOVED_TILES = 4
+ENDLESS_FLOWERS = 70
+# This is how many chunks away from the camera a chunk can be before it is removed
+ENDLESS_CHUNK_RADIUS = 4
+# This is the maximum number of chunks that are kept before the least recently used are removed
+MAX_ENDLESS_CHUNKS = 128
+# This is how many tiles beyond the border limits tiles are picked from when finding a random location outside of them
+ENDLESS_SPAWN_DISTANCE = 15
+
+class EndlessMaze:
+    """
+    A maze with no edges which is split into chunks that are generated when they are first needed and removed when they are far away
+    Each chunk is a perfect maze surrounded by hedge walls with a gap in each wall, so every chunk is connected to all of its neighbours
+    The gaps are worked out from the seed and the chunk locations alone, so chunks can be generated in any order and always match up
+    """
+    def __init__(self, game, tile_size, seed):
+        self.game = game
+        self.tile_size = tile_size
+        self.resolution = None
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.chunks = OrderedDict()
+        self.chunk_surfs = {}
+        self.tilemap_changed = False
+        # The locations of the tiles changed with change_tile in the order they were changed, like in a normal maze
+        self.changed_locs = []
+
+    def get_loc(self, pos):
+        """
+        Gets the tile location of a given position
+        """
+        return (math.floor(pos[0] / self.tile_size), math.floor(pos[1] / self.tile_size))
+
+    def get_chunk_loc(self, loc):
+        """
+        Gets the location of the chunk that a tile location is in
+        """
+        return (loc[0] // ENDLESS_CHUNK_SIZE, loc[1] // ENDLESS_CHUNK_SIZE)
+
+    def get_gap(self, chunk_loc, side):
+        """
+        Returns where the gap is in the left ('x') or top ('y') wall of a chunk, which is shared with the chunk to the left or above it
+        """
+        return random.Random(f"{self.seed}:{side}:{chunk_loc[0]}:{chunk_loc[1]}").randrange(ENDLESS_CHUNK_SIZE // 2) * 2 + 1
+
+    def generate_chunk(self, chunk_loc):
+        """
+        Generates a chunk of the maze as its own small maze
+        """
+        rng = random.Random(f"{self.seed}:{chunk_loc[0]}:{chunk_loc[1]}")
+        chunk = Maze(self.game, self.tile_size, (ENDLESS_CHUNK_SIZE, ENDLESS_CHUNK_SIZE))
+        chunk.origin = (chunk_loc[0] * ENDLESS_CHUNK_SIZE, chunk_loc[1] * ENDLESS_CHUNK_SIZE)
+
+        # Carves the paths starting from the top left tile which keeps the tiles on the edges of the chunk as hedges
+        fill_hedges(chunk)
+        carve_maze(chunk, rng, (1, 1))
+        remove_hedges(chunk, ENDLESS_REMOVED_TILES, rng, (1, 1), (ENDLESS_CHUNK_SIZE - 2, ENDLESS_CHUNK_SIZE - 2))
+        chunk.index_locations()
+        place_flowers(chunk, ENDLESS_FLOWERS, rng)
+
+        # Fills the padding with the walls of the neighbouring chunks and opens the gaps in the walls on both sides
+        add_border(chunk)
+        left, right = self.get_gap(chunk_loc, 'x'), self.get_gap((chunk_loc[0] + 1, chunk_loc[1]), 'x')
+        top, bottom = self.get_gap(chunk_loc, 'y'), self.get_gap((chunk_loc[0], chunk_loc[1] + 1), 'y')
+        for loc in ((-1, left), (0, left), (ENDLESS_CHUNK_SIZE - 1, right), (ENDLESS_CHUNK_SIZE, right), (top, -1), (top, 0), (bottom, ENDLESS_CHUNK_SIZE - 1), (bottom, ENDLESS_CHUNK_SIZE)):
+            chunk.set_type(loc, "path")
+
+        chunk.autotile()
+        chunk.build_collision_rects()
+        return chunk
+
+    def get_chunk(self, chunk_loc):
+        """
+        Returns a chunk, generating it first if it doesn't exist
+        """
+        if chunk_loc in self.chunks:
+            self.chunks.move_to_end(chunk_loc)
+            return self.chunks[chunk_loc]
+
+        # Generates the chunk and removes the least recently used chunk if there are too many
+        self.chunks[chunk_loc] = self.generate_chunk(chunk_loc)
+        if len(self.chunks) > MAX_ENDLESS_CHUNKS:
+            self.remove_chunk(next(iter(self.chunks)))
+        return self.chunks[chunk_loc]
+
+    def remove_chunk(self, chunk_loc):
+        """
+        Removes a chunk and its surface. It will be generated exactly the same if it is needed again
+        """
+        self.chunks.pop(chunk_loc)
+        self.chunk_surfs.pop(chunk_loc, None)
+
+    def get_local(self, loc):
+        """
+        Returns the chunk that a tile location is in along with the location of the tile within the chunk
+        """
+        chunk_loc = self.get_chunk_loc(loc)
+        return self.get_chunk(chunk_loc), (loc[0] - chunk_loc[0] * ENDLESS_CHUNK_SIZE, loc[1] - chunk_loc[1] * ENDLESS_CHUNK_SIZE)
+
+    def get_code(self, loc):
+        """
+        Gets the code of the tile at a location
+        """
+        chunk, local_loc = self.get_local(loc)
+        return chunk.get_code(local_loc)
+
+    def get_type(self, loc):
+        """
+        Gets the type of the tile at a location
+        """
+        return TILE_TYPES[self.get_code(loc)]
+
+    def is_path(self, loc):
+        """
+        Returns whether the tile at a location is a path
+        """
+        chunk, local_loc = self.get_local(loc)
+        return chunk.is_path(local_loc)
+
+    def is_reachable(self, starting_loc, destination):
+        """
+        Returns whether there is a path from a starting location to a destination without searching for it
+        Every chunk is connected to its neighbours so all the paths are connected, as long as tiles haven't been changed to cut them off
+        """
+        if starting_loc == destination:
+            return True
+        if not self.is_path(destination):
+            return False
+        return self.is_path(starting_loc) or any(self.is_path(neighbour) for neighbour in self.get_neighbour_locs(starting_loc, diagonals=False))
+
+    def change_tile(self, loc, type):
+        """
+        Changes the type of a tile. Only tiles inside the walls of a chunk should be changed as the neighbouring chunks won't see the change
+        """
+        chunk, local_loc = self.get_local(loc)
+        chunk.change_tile(local_loc, type)
+        self.chunk_surfs.pop(self.get_chunk_loc(loc), None)
+        self.changed_locs.append(loc)
+
+    def get_tile(self, pos):
+        """
+        Gets the tile at a position
+        """
+        loc = self.get_loc(pos)
+        chunk, local_loc = self.get_local(loc)
+        tile = chunk.tiles[local_loc]
+        tile['loc'] = loc
+        return tile
+
+    def get_neighbour_locs(self, loc, diagonals=True):
+        """
+        Gets the locations of all the neighbouring tiles around a given location
+        """
+        offsets = NEIGHBOUR_OFFSETS + DIAGONAL_OFFSETS if diagonals else NEIGHBOUR_OFFSETS
+        return [(loc[0] + offset[0], loc[1] + offset[1]) for offset in offsets]
+
+    def get_neighbours(self, tile, diagonals=True):
+        """
+        Gets all the neighbouring tiles around a given tile
+        """
+        return [self.get_tile((loc[0] * self.tile_size, loc[1] * self.tile_size)) for loc in self.get_neighbour_locs(tile['loc'], diagonals)]
+
+    def get_neighbour_rects(self, loc, diagonals=True):
+        """
+        Returns rects for the hedge neighbours of a given tile location
+        """
+        return [pygame.Rect(neighbour[0] * self.tile_size, neighbour[1] * self.tile_size, self.tile_size, self.tile_size) for neighbour in self.get_neighbour_locs(loc, diagonals) if self.get_code(neighbour) == HEDGE]
+
+    def get_collision_rects(self, loc):
+        """
+        Returns the rects of the hedges around a tile location. These are shared so they must not be changed
+        """
+        chunk, local_loc = self.get_local(loc)
+        return chunk.get_collision_rects(local_loc)
+
+    def get_hedge_sides(self, loc):
+        """
+        Returns a list of the sides of a given tile location which are hedges
+        """
+        chunk, local_loc = self.get_local(loc)
+        return chunk.get_hedge_sides(local_loc)
+
+    def get_random_loc(self, type, border_limits=None, border_function='inside', rng=None, reachable_from=None):
+        """
+        Returns a random tile location of a specified type or None if there are no tiles of that type
+        Allows you to optionally define two border locations for where the tile should fit between, which defaults to the chunk at (0, 0)
+        Tiles outside of the border locations are picked from within ENDLESS_SPAWN_DISTANCE tiles of them
+        Allows you to optionally give a location which there must be a path from to the tile, like in a normal maze
+        """
+        if rng == None:
+            rng = self.random
+        if border_limits == None:
+            border_limits = ((0, 0), (ENDLESS_CHUNK_SIZE - 1, ENDLESS_CHUNK_SIZE - 1))
+
+        # Finds the area that tiles are picked from
+        if border_function == 'inside':
+            area = border_limits
+        else:
+            area = ((border_limits[0][0] - ENDLESS_SPAWN_DISTANCE, border_limits[0][1] - ENDLESS_SPAWN_DISTANCE), (border_limits[1][0] + ENDLESS_SPAWN_DISTANCE, border_limits[1][1] + ENDLESS_SPAWN_DISTANCE))
+
+        # Finds the slices of the location index within the area for each chunk that overlaps it
+        segments = []
+        top_left_chunk, bottom_right_chunk = self.get_chunk_loc(area[0]), self.get_chunk_loc(area[1])
+        for chunk_x in range(top_left_chunk[0], bottom_right_chunk[0] + 1):
+            for chunk_y in range(top_left_chunk[1], bottom_right_chunk[1] + 1):
+                chunk = self.get_chunk((chunk_x, chunk_y))
+                local_limits = tuple((limit[0] - chunk.origin[0], limit[1] - chunk.origin[1]) for limit in border_limits)
+                local_area = tuple((min(max(limit[0] - chunk.origin[0], 0), ENDLESS_CHUNK_SIZE - 1), min(max(limit[1] - chunk.origin[1], 0), ENDLESS_CHUNK_SIZE - 1)) for limit in area)
+                if border_function == 'inside':
+                    chunk_segments = chunk.get_location_segments(type, local_area, 'inside')
+                else:
+                    chunk_segments = chunk.get_location_segments(type, local_limits, 'outside', local_area)
+                segments.extend((chunk.origin, segment) for segment in chunk_segments)
+
+        # Picks a random tile from all the slices
+        total = sum(end - start for origin, (y, row, start, end) in segments)
+        if total == 0:
+            return None
+        choice = rng.randrange(total)
+        for origin, (y, row, start, end) in segments:
+            if choice < end - start:
+                loc = (row[start + choice] + origin[0], y + origin[1])
+                break
+            choice -= end - start
+
+        # Paths are almost always connected in an endless maze so only one tile is tried
+        if reachable_from != None and not self.is_reachable(reachable_from, loc):
+            return None
+        return loc
+
+    def update(self):
+        """
+        Removes the chunks which are far away from the camera
+        """
+        camera_chunk = self.get_chunk_loc(self.get_loc((self.game.camera_displacement[0] + self.game.display.get_width() // 2, self.game.camera_displacement[1] + self.game.display.get_height() // 2)))
+        for chunk_loc in list(self.chunks):
+            if max(abs(chunk_loc[0] - camera_chunk[0]), abs(chunk_loc[1] - camera_chunk[1])) > ENDLESS_CHUNK_RADIUS:
+                self.remove_chunk(chunk_loc)
+
+    def get_chunk_surf(self, chunk_loc):
+        """
+        Returns the pre-drawn surface of a chunk, drawing it first if it hasn't been drawn yet
+        """
+        if chunk_loc not in self.chunk_surfs:
+            chunk = self.get_chunk(chunk_loc)
+            surf = pygame.Surface((ENDLESS_CHUNK_SIZE * self.tile_size, ENDLESS_CHUNK_SIZE * self.tile_size), pygame.SRCALPHA)
+            chunk.draw_tiles(surf, (0, 0), (ENDLESS_CHUNK_SIZE - 1, ENDLESS_CHUNK_SIZE - 1), (0, 0))
+            self.chunk_surfs[chunk_loc] = surf
+        return self.chunk_surfs[chunk_loc]
+
+    def draw(self):
+        """
+        Draws all the chunks visible on the screen
+        """
+        chunk_width = ENDLESS_CHUNK_SIZE * self.tile_size
+        camera_displacement = self.game.camera_displacement
+        for chunk_x in range(camera_displacement[0] // chunk_width, (camera_displacement[0] + self.game.display.get_width()) // chunk_width + 1):
+            for chunk_y in range(camera_displacement[1] // chunk_width, (camera_displacement[1] + self.game.display.get_height()) // chunk_width + 1):
+                self.game.display.blit(self.get_chunk_surf((chunk_x, chunk_y)), (chunk_x * chunk_width - camera_displacement[0], chunk_y * chunk_width - camera_displacement[1]))
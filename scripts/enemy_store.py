@@ -0,0 +1,178 @@
+from itertools import compress, repeat
+from operator import add, mul, neg, gt
+
+from scripts.entities import Enemy, KNOCKBACK_TIME
+
+class EnemyStore:
+    """
+    Keeps the speeds, knockback and stun timers of the enemies in parallel arrays instead of on each enemy (a structure of arrays)
+    The displacements of all the enemies are worked out together each frame by mapping over whole arrays, so the loops run in C rather than in Python
+    Each enemy only runs its own code to decide where to go, to collide with the hedges around it and to update its animation
+    """
+    def __init__(self, game):
+        self.game = game
+        self.enemies = []
+        # The position lists of the enemies, which are shared with the enemies rather than copied as their own code reads them far more often than the store moves them
+        self.positions = []
+        self.speeds = []
+        self.knockback_xs = []
+        self.knockback_ys = []
+        self.knockback_timers = []
+        self.stunned_timers = []
+        # The direction each enemy has decided to move in along each axis, which is -1, 0 or 1, and how much its speed is slowed by
+        self.move_xs = []
+        self.move_ys = []
+        self.slows = []
+        # How far each enemy is from the point it is walking towards along each axis, which it doesn't walk past
+        self.target_xs = []
+        self.target_ys = []
+        # The velocity pushing each enemy away from the enemies it is too close to
+        self.separation_xs = []
+        self.separation_ys = []
+        # The time step of each enemy this frame, which is 0 for the enemies that aren't due an update so they don't move
+        self.dts = []
+        self.multis = []
+        self.arrays = (self.positions, self.speeds, self.knockback_xs, self.knockback_ys, self.knockback_timers, self.stunned_timers, self.move_xs, self.move_ys, self.slows, self.target_xs, self.target_ys, self.separation_xs, self.separation_ys, self.dts, self.multis)
+
+    def add(self, enemy):
+        """
+        Gives an enemy a slot at the end of the arrays
+        """
+        enemy.store = self
+        enemy.store_index = len(self.enemies)
+        self.enemies.append(enemy)
+        for values in self.arrays:
+            values.append(0)
+
+    def remove(self, enemy):
+        """
+        Removes an enemy by moving the last enemy into its slot
+        """
+        index = enemy.store_index
+        enemy.store_index = None
+        last_enemy = self.enemies.pop()
+        if last_enemy != enemy:
+            self.enemies[index] = last_enemy
+            last_enemy.store_index = index
+        for values in self.arrays:
+            values[index] = values[-1]
+            values.pop()
+
+    def get_displacements(self, resting):
+        """
+        Returns arrays of how far every enemy moves this frame along each axis
+        The knockback timers are counted down, along with the stun timers of the resting enemies, which didn't decide where to go this frame, unless they are being knocked back
+        """
+        # Every enemy is given the displacement of walking in the direction it has decided on, which is worked out for all of them at once
+        # The walking stops at the points the enemies are walking towards, and then the enemies are pushed away from the enemies around them
+        walking_speeds = list(map(mul, map(mul, self.speeds, self.multis), self.slows))
+        x_walking = map(max, map(neg, self.target_xs), map(min, self.target_xs, map(mul, self.move_xs, walking_speeds)))
+        y_walking = map(max, map(neg, self.target_ys), map(min, self.target_ys, map(mul, self.move_ys, walking_speeds)))
+        x_displacements = list(map(add, x_walking, map(mul, self.separation_xs, self.multis)))
+        y_displacements = list(map(add, y_walking, map(mul, self.separation_ys, self.multis)))
+
+        # Only a few enemies are stunned or knocked back at once, so they are found first and then updated one by one
+        for index in resting:
+            if self.knockback_timers[index] <= 0:
+                self.stunned_timers[index] -= self.dts[index]
+        for index in compress(range(len(self.enemies)), map(gt, self.knockback_timers, repeat(0))):
+            knockback_timer = self.knockback_timers[index]
+            x_displacements[index] = self.knockback_xs[index] * (knockback_timer / KNOCKBACK_TIME) * self.multis[index]
+            y_displacements[index] = self.knockback_ys[index] * (knockback_timer / KNOCKBACK_TIME) * self.multis[index]
+            self.knockback_timers[index] = knockback_timer - self.dts[index]
+        return x_displacements, y_displacements
+
+    def move(self, axis, displacements):
+        """
+        Adds the displacements of the enemies along one axis to their positions
+        """
+        for pos, displacement in zip(self.positions, displacements):
+            pos[axis] += displacement
+
+    def update(self, enemies):
+        """
+        Updates the enemies which are due an update this frame, which have had their time steps set
+        Each enemy decides where to go first, then the timers and displacements of all the enemies are worked out together
+        The enemies are moved along the x axis and collided with the hedges, then along the y axis, and then their animations are updated
+        """
+        resting = []
+        move_xs, move_ys, slows, target_xs, target_ys = self.move_xs, self.move_ys, self.slows, self.target_xs, self.target_ys
+        self.dts[:] = self.multis[:] = [0] * len(self.enemies)
+        for enemy in enemies:
+            index = enemy.store_index
+            self.dts[index], self.multis[index] = enemy.dt, enemy.multi
+            enemy.moving = {'left': False, 'right': False, 'up': False, 'down': False}
+            if self.stunned_timers[index] <= 0 and not enemy.animation.current_animation == "death":
+                enemy.think()
+            else:
+                resting.append(index)
+            moving = enemy.moving
+            move_xs[index] = moving['right'] - moving['left']
+            move_ys[index] = moving['down'] - moving['up']
+            # Enemies move at x0.75 speed while they are attacking
+            slows[index] = 0.75 if "attack" in enemy.animation.current_animation else 1
+            target_xs[index], target_ys[index] = abs(enemy.target_displacement[0]), abs(enemy.target_displacement[1])
+            enemy.separation = enemy.get_separation()
+            self.separation_xs[index], self.separation_ys[index] = enemy.separation
+
+        # Moves every enemy along each axis and then collides each of them with the hedges around them
+        x_displacements, y_displacements = self.get_displacements(resting)
+        self.move(0, x_displacements)
+        collisions = [enemy.collide_x(x_displacements[enemy.store_index]) for enemy in enemies]
+        self.move(1, y_displacements)
+        for enemy, (feet_rect, neighbours) in zip(enemies, collisions):
+            enemy.collide_y(y_displacements[enemy.store_index], feet_rect, neighbours)
+            enemy.update_facing()
+
+        # Enemies can be removed here once their death animation is over, so this is done last
+        for enemy in enemies:
+            enemy.update_state()
+
+
+class BatchedEnemy(Enemy):
+    """
+    An enemy whose speed, knockback and stun timer are kept in the game's enemy store
+    """
+    def __init__(self, game, loc, size, speed, health, color):
+        game.enemy_store.add(self)
+        super().__init__(game, loc, size, speed, health, color)
+        self.store.positions[self.store_index] = self.pos
+
+    @property
+    def speed(self):
+        return self.store.speeds[self.store_index]
+
+    @speed.setter
+    def speed(self, speed):
+        self.store.speeds[self.store_index] = speed
+
+    @property
+    def knockback_velocity(self):
+        return (self.store.knockback_xs[self.store_index], self.store.knockback_ys[self.store_index])
+
+    @knockback_velocity.setter
+    def knockback_velocity(self, velocity):
+        self.store.knockback_xs[self.store_index], self.store.knockback_ys[self.store_index] = velocity
+
+    @property
+    def knockback_timer(self):
+        return self.store.knockback_timers[self.store_index]
+
+    @knockback_timer.setter
+    def knockback_timer(self, timer):
+        self.store.knockback_timers[self.store_index] = timer
+
+    @property
+    def stunned_timer(self):
+        return self.store.stunned_timers[self.store_index]
+
+    @stunned_timer.setter
+    def stunned_timer(self, timer):
+        self.store.stunned_timers[self.store_index] = timer
+
+    def kill(self):
+        """
+        Removes the enemy from the store as well as everything else it is removed from
+        """
+        super().kill()
+        self.store.remove(self)
@@ -17,6 +17,10 @@ STUN_TIME = 1
 PLAYER_ATTACK_RANGE = 8
 # This is the attack range of the enemy
 ENEMY_ATTACK_RANGE = 4
+# This is how close the centers of two enemies can be before they start pushing each other apart
+SEPARATION_DISTANCE = 12
+# This is the fastest that an enemy is pushed away from the enemies around it
+SEPARATION_SPEED = 0.5
 # This is the height of the rect used to detect collisions
 FEET_HEIGHT = 4
 # This is the speed of the player when dashing (keep as float)
@@ -27,6 +31,8 @@ DASHING_TIMER = 0.2
 EXPLOSION_TIMER = 0.75
 # This is how long the player sweeps for
 SPIRAL_TIMER = 0.75
+# This is how often enemies off of the screen are updated in seconds
+OFF_SCREEN_UPDATE_TIME = 1/15
 
 class Entity:
     def __init__(self, game, loc, size, speed, health):
@@ -43,6 +49,9 @@ class Entity:
         self.health = health
         self.glow_timer = random.uniform(0, 2 * math.pi)
         self.special_attack = {'name': None}
+        # The time step the entity moves by, which is the time since it was last updated
+        self.dt = 0
+        self.multi = 0
 
     def get_center(self):
         """
@@ -56,6 +65,12 @@ class Entity:
         """
         return pygame.Rect(*self.pos, *self.size)
     
+    def get_feet_loc(self):
+        """
+        Returns the tile location of the middle of the entity's feet
+        """
+        return self.game.maze.get_loc((self.pos[0] + self.size[0] // 2, self.pos[1] + self.size[1] - (FEET_HEIGHT // 2)))
+
     def get_feet_rect(self):
         """
         Returns a rect at the entity's feet
@@ -70,28 +85,42 @@ class Entity:
         self.knockback_velocity = get_vector((self.get_center(), point), speed)
         self.knockback_timer = KNOCKBACK_TIME
     
-    def update(self):
+    def set_time_step(self, dt):
         """
-        Updates the entity's position
+        Sets the time since the entity was last updated, along with the multiplier for its movement
+        """
+        self.dt = dt
+        self.multi = dt * 60
+
+    def get_displacement(self):
+        """
+        Returns how far the entity moves this frame along each axis
         """
         # Checks whether the entity is being knocked back and calculates the displacement and decrements the timer if so
         if self.knockback_timer > 0:
-            x_displacement = self.knockback_velocity[0] * (self.knockback_timer / KNOCKBACK_TIME) * self.game.multi
-            y_displacement = self.knockback_velocity[1] * (self.knockback_timer / KNOCKBACK_TIME) * self.game.multi
-            self.knockback_timer -= self.game.dt
+            x_displacement = self.knockback_velocity[0] * (self.knockback_timer / KNOCKBACK_TIME) * self.multi
+            y_displacement = self.knockback_velocity[1] * (self.knockback_timer / KNOCKBACK_TIME) * self.multi
+            self.knockback_timer -= self.dt
         # Checks if the entity has a special attack active and uses the velocity from the attack if it does
         elif self.special_attack['name'] != None:
-            x_displacement = self.special_attack['vel'][0] * self.game.multi
-            y_displacement = self.special_attack['vel'][1] * self.game.multi
+            x_displacement = self.special_attack['vel'][0] * self.multi
+            y_displacement = self.special_attack['vel'][1] * self.multi
         else:
             # Calculates the displacement based on the directions the entity is moving and slows speed to x0.75 if the entity is attacking
-            x_displacement = ((self.moving['right'] * self.speed) - (self.moving['left'] * self.speed)) * self.game.multi * (0.75 if "attack" in self.animation.current_animation else 1)
-            y_displacement = ((self.moving['down'] * self.speed) - (self.moving['up'] * self.speed)) * self.game.multi * (0.75 if "attack" in self.animation.current_animation else 1)
+            x_displacement = ((self.moving['right'] * self.speed) - (self.moving['left'] * self.speed)) * self.multi * (0.75 if "attack" in self.animation.current_animation else 1)
+            y_displacement = ((self.moving['down'] * self.speed) - (self.moving['up'] * self.speed)) * self.multi * (0.75 if "attack" in self.animation.current_animation else 1)
+        return x_displacement, y_displacement
 
-        # Adds the x displacement and checks for collisions with all neighbours
-        self.pos[0] += x_displacement
+    def collide_x(self, x_displacement):
+        """
+        Moves the entity out of any hedges it has moved into along the x axis
+        Returns the feet rect of the entity and the rects of the hedges around it so they can be used for the y axis too
+        """
         feet_rect = self.get_feet_rect()
-        neighbours = self.game.maze.get_neighbour_rects(self.game.maze.get_tile(feet_rect.center))
+        neighbours = self.game.maze.get_collision_rects(self.game.maze.get_loc(feet_rect.center))
+        # The feet are usually not in any of the hedges, which collidelist checks in one call
+        if feet_rect.collidelist(neighbours) == -1:
+            return feet_rect, neighbours
         for rect in neighbours:
             if feet_rect.colliderect(rect):
                 if x_displacement > 0:
@@ -99,10 +128,16 @@ class Entity:
                 else:
                     feet_rect.left = rect.right
                 self.pos[0] = feet_rect.x
+        return feet_rect, neighbours
 
-        # Adds the y displacement and checks for collisions with all neighbours
-        self.pos[1] += y_displacement
-        feet_rect = self.get_feet_rect()
+    def collide_y(self, y_displacement, feet_rect, neighbours):
+        """
+        Moves the entity out of any hedges it has moved into along the y axis
+        The feet rect from the x axis is moved to the entity's new position rather than creating another one. The position is truncated like it is when a rect is created
+        """
+        feet_rect.y = int(self.pos[1] + self.size[1] - FEET_HEIGHT)
+        if feet_rect.collidelist(neighbours) == -1:
+            return
         for rect in neighbours:
             if feet_rect.colliderect(rect):
                 if y_displacement > 0:
@@ -111,11 +146,28 @@ class Entity:
                     feet_rect.top = rect.bottom
                 self.pos[1] = feet_rect.bottom - self.size[1]
 
+    def update(self):
+        """
+        Updates the entity's position
+        """
+        x_displacement, y_displacement = self.get_displacement()
+
+        # Adds the x displacement and checks for collisions with all neighbours, then does the same for the y displacement
+        self.pos[0] += x_displacement
+        feet_rect, neighbours = self.collide_x(x_displacement)
+        self.pos[1] += y_displacement
+        self.collide_y(y_displacement, feet_rect, neighbours)
+        self.update_facing()
+
+    def update_facing(self):
+        """
+        Updates the flip of the entity's animation and its glow after it has moved
+        """
         # Changes the flip of the entity's animation based on whether they are moving left or right
         if self.moving['right'] and self.animation.current_animation != "death": self.animation.flip = False
         if self.moving['left'] and self.animation.current_animation != "death": self.animation.flip = True
 
-        self.glow_timer = (self.glow_timer + self.game.dt * 2) % (2 * math.pi)
+        self.glow_timer = (self.glow_timer + self.dt * 2) % (2 * math.pi)
 
     def draw(self):
         """
@@ -247,7 +299,7 @@ class Player(Entity):
             if not self.has_hit or self.special_attack['name'] == "dash":
                 # Checks whether there are enemies within the player's attack rect and hits them if so
                 attack_rect = self.get_attack_rect()
-                for enemy in self.game.enemies:
+                for enemy in self.game.enemy_hash.query(attack_rect):
                     if attack_rect.colliderect(enemy.get_rect()):
                         enemy.hit(color="purple" if self.special_attack['name'] == "dash" else None)
                         self.has_hit = True
@@ -343,6 +395,14 @@ class Enemy(Entity):
         self.path = []
         self.stunned_timer = 0
         self.slime_particle_timer = 0
+        # Enemies off of the screen are updated less often and don't create particles
+        self.on_screen = True
+        self.lod_timer = 0
+        # The displacement from the enemy to the point it is walking towards
+        self.target_displacement = (0, 0)
+        # The velocity pushing the enemy away from the enemies it is too close to
+        self.separation = (0, 0)
+        self.game.enemy_hash.update(self)
 
     def get_attack_rect(self):
         """
@@ -376,42 +436,21 @@ class Enemy(Entity):
 
     def calculate_path(self):
         """
-        Uses an A* search to find the shortest path from the enemy to the player
-        Each node is formatted as [tile location, parent tile location, cost, Manhattan distance + cost]
+        Finds the shortest path from the enemy to the player, killing the enemy if there is no path
         """
         # Finds the starting tile the enemy is in and the destination tile which the player is in
         starting_tile_loc = self.game.maze.get_loc(self.get_center())
-        destination = self.game.maze.get_loc((self.game.player.pos[0] + self.game.player.size[0] // 2, self.game.player.pos[1] + self.game.player.size[1] - (FEET_HEIGHT // 2)))
+        destination = self.game.player.get_feet_loc()
 
-        # Initialises frontier to starting position
-        frontier = {(starting_tile_loc, None, 0, 0)}
-        explored_tiles = set()
-
-        while True:
-            # Checks if the frontier is empty as if the frontier is empty and target has not been found, there must be no possible path to the target
-            if len(frontier) == 0:
-                self.kill()
-                return
-            
-            # Calculates which node has the lowest cost
-            node = min(frontier, key=lambda node: node[3])
-            frontier.remove(node)
-            explored_tiles.add(node[0])
-
-            # Checks whether the node is the target node
-            if node[0] == destination:
-                break
-            else:
-                # Adds the node tile's neighbours to the frontier if the tile is a path and it hasn't been explored
-                for neighbour in self.game.maze.get_neighbours(self.game.maze.tiles[node[0]], diagonals=False):
-                    if neighbour['type'] == "path" and neighbour['loc'] not in explored_tiles:
-                        frontier.add((neighbour['loc'], node, node[2] + 1, node[2] + 1 + abs(neighbour['loc'][0] - destination[0]) + abs(neighbour['loc'][1] - destination[1])))
+        # Checks whether the player can be reached before searching, as a search for a path that doesn't exist searches every tile it can reach
+        if not self.game.maze.is_reachable(starting_tile_loc, destination):
+            self.kill()
+            return
 
-        # Backtracks using the parent of each node to find the shortest path
-        shortest_path = []
-        while node[1] != None:
-            shortest_path.insert(0, node[0])
-            node = node[1]
+        shortest_path = self.game.pathfinder.get_path(starting_tile_loc, destination)
+        if shortest_path == None:
+            self.kill()
+            return
 
         self.path = shortest_path
 
@@ -422,6 +461,99 @@ class Enemy(Entity):
         center = self.get_center()
         return ((loc[0] * self.game.maze.tile_size) + (self.game.maze.tile_size // 2) - center[0], (loc[1] * self.game.maze.tile_size) + (self.game.maze.tile_size // 2) - center[1])
 
+    def think(self):
+        """
+        Decides which way the enemy moves to follow its path to the player and attacks the player if they are in range
+        """
+        # Checks whether the enemy is close to the center of a tile and finds a new path if so
+        # The enemy walks straight towards the player if it can see them, otherwise it asks for a new path and follows its current path until it gets one
+        loc = self.game.maze.get_loc(self.get_center())
+        displacement = self.get_displacement_from_center(loc)
+        if abs(displacement[0]) <= MAX_DISTANCE and abs(displacement[1]) <= MAX_DISTANCE or len(self.path) == 0:
+            line = self.game.line_of_sight.get_path(loc, self.game.player.get_feet_loc())
+            if line != None:
+                self.path = line
+                self.game.path_scheduler.cancel(self)
+            else:
+                self.game.path_scheduler.request_path(self)
+
+        # Checks whether the enemy is near the center of a tile and if so, removes the tile from the path 
+        if len(self.path) != 0:
+            displacement = self.get_displacement_from_center(self.path[0])
+            if abs(displacement[0]) <= MAX_DISTANCE and abs(displacement[1]) <= MAX_DISTANCE:
+                self.path.remove(self.path[0])
+
+        # Gets the displacement from the center of the tile
+        if len(self.path) != 0:
+            displacement = self.get_displacement_from_center(self.path[0])
+        else:
+            # Checks whether the enemy is within attacking range of the player and attacks if so or gets the displacement from the enemy to the player
+            attack_rect = self.get_attack_rect()
+            if attack_rect.colliderect(self.game.player.get_rect()):
+                self.game.player.hit(self)
+                self.stunned_timer = STUN_TIME
+                displacement = (0, 0)
+                AudioPlayer.play_sound("enemy_attack")
+            else:
+                displacement = (self.game.player.pos[0] - self.pos[0], self.game.player.pos[1] - self.pos[1])
+        
+        # Determines the direction the enemy needs to move based on their displacement from their target
+        self.target_displacement = displacement
+        if displacement[0] < -MAX_DISTANCE:
+            self.moving['left'] = True
+        if displacement[0] > MAX_DISTANCE:
+            self.moving['right'] = True
+        if displacement[1] < -MAX_DISTANCE:
+            self.moving['up'] = True
+        if displacement[1] > MAX_DISTANCE:
+            self.moving['down'] = True
+
+    def get_separation(self):
+        """
+        Returns a velocity which pushes the enemy away from the enemies whose centers are too close to its center, so enemies following the same path don't pile up
+        The enemies are found with the spatial hash so only the enemies near the enemy are checked
+        """
+        if self.animation.current_animation == "death":
+            return (0, 0)
+
+        center = self.get_center()
+        x_separation, y_separation = 0, 0
+        for enemy in self.game.enemy_hash.query(self.get_rect()):
+            if enemy == self or enemy.animation.current_animation == "death":
+                continue
+            other_center = enemy.get_center()
+            displacement = (center[0] - other_center[0], center[1] - other_center[1])
+            distance = math.hypot(*displacement)
+            if distance < SEPARATION_DISTANCE:
+                # Enemies on top of each other are pushed in a random direction as there is no direction between them
+                if distance == 0:
+                    angle = random.uniform(0, 2 * math.pi)
+                    displacement, distance = (math.cos(angle), math.sin(angle)), 1
+                # Closer enemies push harder
+                strength = (SEPARATION_DISTANCE - distance) / SEPARATION_DISTANCE
+                x_separation += displacement[0] / distance * strength
+                y_separation += displacement[1] / distance * strength
+
+        # Limits the push so it never moves the enemy faster than the separation speed
+        length = math.hypot(x_separation, y_separation)
+        if length > 1:
+            x_separation, y_separation = x_separation / length, y_separation / length
+        return (x_separation * SEPARATION_SPEED, y_separation * SEPARATION_SPEED)
+
+    def get_displacement(self):
+        """
+        Returns how far the enemy moves this frame, which includes being pushed away from the enemies around it unless it is being knocked back
+        The enemy stops at its target instead of walking past it, as enemies off of the screen move far enough in one update to keep stepping over the center of a tile otherwise
+        """
+        knocked_back = self.knockback_timer > 0
+        x_displacement, y_displacement = super().get_displacement()
+        if not knocked_back:
+            x_displacement = max(-abs(self.target_displacement[0]), min(abs(self.target_displacement[0]), x_displacement))
+            y_displacement = max(-abs(self.target_displacement[1]), min(abs(self.target_displacement[1]), y_displacement))
+            x_displacement += self.separation[0] * self.multi
+            y_displacement += self.separation[1] * self.multi
+        return x_displacement, y_displacement
+
     def update(self):
         """
         Updates the player's movement, attack, animation and particles
@@ -429,46 +561,20 @@ class Enemy(Entity):
         self.moving = {'left': False, 'right': False, 'up': False, 'down': False}
 
         if self.stunned_timer <= 0 and not self.animation.current_animation == "death":
-            # Checks whether the enemy is close to the center of a tile and refreshes their path if so
-            displacement = self.get_displacement_from_center(self.game.maze.get_loc(self.get_center()))
-            if abs(displacement[0]) <= MAX_DISTANCE and abs(displacement[1]) <= MAX_DISTANCE or len(self.path) == 0:
-                self.calculate_path()
-
-            # Checks whether the enemy is near the center of a tile and if so, removes the tile from the path 
-            if len(self.path) != 0:
-                displacement = self.get_displacement_from_center(self.path[0])
-                if abs(displacement[0]) <= MAX_DISTANCE and abs(displacement[1]) <= MAX_DISTANCE:
-                    self.path.remove(self.path[0])
-
-            # Gets the displacement from the center of the tile
-            if len(self.path) != 0:
-                displacement = self.get_displacement_from_center(self.path[0])
-            else:
-                # Checks whether the enemy is within attacking range of the player and attacks if so or gets the displacement from the enemy to the player
-                attack_rect = self.get_attack_rect()
-                if attack_rect.colliderect(self.game.player.get_rect()):
-                    self.game.player.hit(self)
-                    self.stunned_timer = STUN_TIME
-                    displacement = (0, 0)
-                    AudioPlayer.play_sound("enemy_attack")
-                else:
-                    displacement = (self.game.player.pos[0] - self.pos[0], self.game.player.pos[1] - self.pos[1])
-            
-            # Determines the direction the enemy needs to move based on their displacement from their target
-            if displacement[0] < -MAX_DISTANCE:
-                self.moving['left'] = True
-            if displacement[0] > MAX_DISTANCE:
-                self.moving['right'] = True
-            if displacement[1] < -MAX_DISTANCE:
-                self.moving['up'] = True
-            if displacement[1] > MAX_DISTANCE:
-                self.moving['down'] = True
-
+            self.think()
         # Decrements the stun timer if the knockback timer is over. This means the stun only starts when the knockback has finished
         elif self.knockback_timer <= 0:
-            self.stunned_timer -= self.game.dt
+            self.stunned_timer -= self.dt
+        self.separation = self.get_separation()
    
         super().update()
+        self.update_state()
+
+    def update_state(self):
+        """
+        Updates the enemy's place in the spatial hash, its animation and its particles after it has moved
+        """
+        self.game.enemy_hash.update(self)
 
         # Updates the enemy's animation 
         if not self.animation.current_animation == "death":
@@ -480,14 +586,14 @@ class Enemy(Entity):
             self.kill()
 
         # Creates dirt particles under the enemy's feet if they are running
-        self.dirt_timer += self.game.multi
-        if "running" in self.animation.current_animation and self.dirt_timer > 4:
+        self.dirt_timer += self.multi
+        if "running" in self.animation.current_animation and self.dirt_timer > 4 and self.on_screen:
             self.dirt_timer = 0
             ParticleHandler.create_particle("dirt", self.game, self.get_center())
 
         # Creates dirt particles under the enemy's feet if they are running
-        self.slime_particle_timer += self.game.multi
-        if "running" in self.animation.current_animation and self.slime_particle_timer > 5:
+        self.slime_particle_timer += self.multi
+        if "running" in self.animation.current_animation and self.slime_particle_timer > 5 and self.on_screen:
             self.slime_particle_timer = 0
             ParticleHandler.create_particle("slime", self.game, self.get_center(), parent=self, displacement=(random.randint(-10, 10), random.randint(-3, 3)), color=self.color)
         
@@ -498,6 +604,30 @@ class Enemy(Entity):
         self.game.killed += 1
         AnimationHandler.kill_animation(self.animation)
         self.game.enemies.remove(self)
+        self.game.enemy_hash.remove(self)
+        self.game.path_scheduler.cancel(self)
         AudioPlayer.play_sound("enemy_death")
 
-        
+
+def get_due_enemies(enemies, maze, screen_border, dt):
+    """
+    Returns the enemies which are due an update this frame, setting the time step of each of them to the time since their last update
+    Enemies on the screen are due every frame, while enemies off of the screen are due every OFF_SCREEN_UPDATE_TIME seconds. Every enemy counts as being on the screen if there is no screen border
+    Enemies off of the screen don't create particles and their animations are paused, apart from their death animations so they can still be removed
+    """
+    due_enemies = []
+    for enemy in enemies:
+        if screen_border == None:
+            enemy.on_screen = True
+        else:
+            top_left_loc, bottom_right_loc = screen_border
+            loc = maze.get_loc(enemy.get_center())
+            # Enemies within a tile of the screen count as being on the screen so they don't visibly jump as they come onto it
+            enemy.on_screen = top_left_loc[0] - 1 <= loc[0] <= bottom_right_loc[0] + 1 and top_left_loc[1] - 1 <= loc[1] <= bottom_right_loc[1] + 1
+        enemy.animation.paused = not enemy.on_screen and enemy.animation.current_animation != "death"
+        enemy.lod_timer += dt
+        if enemy.on_screen or enemy.lod_timer >= OFF_SCREEN_UPDATE_TIME:
+            enemy.set_time_step(enemy.lod_timer)
+            enemy.lod_timer = 0
+            due_enemies.append(enemy)
+    return due_enemies
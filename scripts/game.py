@@ -2,6 +2,7 @@ import time
 import random
 import math
 import sys
+import threading
 
 import pygame
 
@@ -9,8 +10,12 @@ from sympy import symbols, Eq, solve, simplify
 
 from scripts.animations import AnimationHandler, load_animation, load_animation_library
 from scripts.hud import HUD
-from scripts.entities import Player, Enemy
-from scripts.maze import generate_maze
+from scripts.entities import Player, Enemy, get_due_enemies
+from scripts.maze import generate_maze, PADDING
+from scripts.endless_maze import EndlessMaze
+from scripts.pathfinding import PATHFINDERS, PATH_BUDGET, PathScheduler, ProcessPathScheduler, LineOfSight
+from scripts.spatial_hash import SpatialHash
+from scripts.enemy_store import EnemyStore, BatchedEnemy
 from scripts.effects import ParticleHandler
 from scripts.utils import AudioPlayer, load_image, load_images, load_data, save_data, get_text_surf, scale_coord_to_new_res, update_scores
 
@@ -66,8 +71,11 @@ class Treasure:
         """
         # Calculates the border locations for the tiles which are on the screen
         top_left_loc, bottom_right_loc = self.game.get_screen_border()
-        # Gets a random path location outside the screen and sets the treasure's location to that location
-        loc = self.game.maze.get_random_loc("path", (top_left_loc, bottom_right_loc), 'outside')
+        # Gets a random path location outside the screen which the player can reach and sets the treasure's location to that location
+        # If one can't be found, any path location outside the screen is used
+        loc = self.game.maze.get_random_loc("path", (top_left_loc, bottom_right_loc), 'outside', reachable_from=self.game.player.get_feet_loc())
+        if loc == None:
+            loc = self.game.maze.get_random_loc("path", (top_left_loc, bottom_right_loc), 'outside')
         self.loc = loc
         self.animation.change_animation("closed")
 
@@ -126,12 +134,37 @@ class Treasure:
         self.game.glow(center, (255, 255, 255), 15 + round(3 * math.sin(self.glow_timer) + random.random()))
 
 class Game:
-    def __init__(self, window, fps):
+    def __init__(self, window, fps, seed=None):
         pygame.display.set_caption("Treasure Trove - Playing game")
         self.kill_screen = False
         self.fps = fps
         self.window = window
-        self.display = pygame.Surface((426, 240))
+        # The options are loaded from the data file once and each setting is read from them
+        options = load_data()['options']
+        # Checks whether the maze should be endless, in which case it is generated in chunks around the camera
+        self.endless = options.get('endless', False)
+        # Checks whether the maze should be drawn by the shader from a tilemap, in which case the display is transparent so the maze shows through
+        # An endless maze has no fixed size so it can't be uploaded as a tilemap and is always blitted instead
+        self.gpu_tilemap = options.get('gpu_tilemap', False) and not self.endless
+        # The algorithm used to carve the paths of the maze
+        self.maze_algorithm = options.get('maze_algorithm', 'dfs')
+        # The way that enemies find their paths to the player
+        # Pathfinders which work on the whole maze at once can't be used with an endless maze, so the flow field is used instead
+        self.pathfinding = options.get('pathfinding', 'flow_field')
+        if self.endless and PATHFINDERS[self.pathfinding].whole_maze:
+            self.pathfinding = 'flow_field'
+        # Enemies queue up for new paths which are found within a time budget each frame
+        # Paths can instead be found by a number of worker processes, which needs a copy of the whole maze so it can't be used with an endless maze
+        path_workers = options.get('path_workers', 0)
+        if path_workers > 0 and not self.endless:
+            self.path_scheduler = ProcessPathScheduler(self, path_workers, options.get('path_budget', PATH_BUDGET))
+        else:
+            self.path_scheduler = PathScheduler(self, options.get('path_budget', PATH_BUDGET))
+        # Checks whether the enemies should be kept in a store of arrays, which moves all of them together each frame
+        self.batched_enemies = options.get('batched_enemies', False)
+        # Checks whether enemies off of the screen should be updated less often
+        self.enemy_lod = options.get('enemy_lod', True)
+        self.display = pygame.Surface((426, 240), pygame.SRCALPHA) if self.gpu_tilemap else pygame.Surface((426, 240))
         self.larger_display = pygame.Surface((1280, 720)).convert_alpha()
         self.clock = pygame.time.Clock()
 
@@ -209,8 +242,25 @@ class Game:
             self.number_images.append(get_text_surf(size=45, text=str(i), colour=(70, 50, 10)))
 
         # Variables about the game
-        self.maze = generate_maze(self, tile_size=32, maze_resolution=(25, 25), removed_tiles=25)
-        self.player = Player(self, self.maze.get_random_loc("path"), (14, 20), 2, 100)
+        self.seed = seed
+        # An endless maze always needs a seed so chunks are generated the same way when they are generated again
+        if self.endless and self.seed == None:
+            self.seed = random.getrandbits(32)
+        # The maze and the player's starting location are generated in the background while the transition is closed
+        self.maze = None
+        self.pathfinder = None
+        self.line_of_sight = None
+        # The enemies are kept in a spatial hash so only the enemies near a rect are checked for collisions with it
+        self.enemy_hash = None
+        self.enemy_store = None
+        self.player = None
+        self.treasure = None
+        self.level = None
+        # The exception raised while generating the level, which is raised again in the main thread when the level would have started
+        self.loading_error = None
+        self.loading_progress = 0
+        self.loading_thread = threading.Thread(target=self.generate_level, daemon=True)
+        self.loading_thread.start()
         self.enemies = []
         self.spikes = []
         self.gold = 0
@@ -218,7 +268,6 @@ class Game:
         self.killed = 0
         self.paused = False
         self.game_over = False
-        self.treasure = Treasure(self)
         self.special_attacks = [3, 3, 3]
         self.maths_question = {'text': "", 'text_surf': get_text_surf(size=20, text="", colour=(255, 255, 255)), 'cursor_timer': 0}
         self.question_flags = {'popup': False, 'correct': [None, None, None], 'current_question': 0, 'correct_timer': 0, 'close_timer': 0, 'close_popup': False}
@@ -274,6 +323,76 @@ class Game:
         self.last_time = time.time()
         self.time = 90 # Midday
 
+    def generate_level(self):
+        """
+        Generates the maze, finds the player's starting location and creates the pathfinder. This runs in a separate thread so the game doesn't freeze while it generates
+        Any exception is stored instead of ending the thread silently, so it can be raised with its original traceback in the main thread
+        """
+        try:
+            if self.endless:
+                maze = EndlessMaze(self, tile_size=32, seed=self.seed)
+            else:
+                maze = generate_maze(self, tile_size=32, maze_resolution=(25, 25), removed_tiles=25, seed=self.seed, algorithm=self.maze_algorithm, progress_callback=self.set_loading_progress)
+
+            # The tilemap is created here but has to be uploaded to the shader in the main thread
+            tilemap = maze.get_tilemap() if self.gpu_tilemap else None
+            # The pathfinder is also created here as some pathfinders work out information about the whole maze when they are created
+            self.level = {'maze': maze, 'player_loc': maze.get_random_loc("path"), 'tilemap': tilemap, 'pathfinder': PATHFINDERS[self.pathfinding](maze)}
+        except Exception as error:
+            self.loading_error = error
+
+    def set_loading_progress(self, progress):
+        """
+        Stores how much of the maze has been generated so it can be shown while loading
+        """
+        self.loading_progress = progress
+
+    def start_level(self):
+        """
+        Starts the game with the level that was generated in the background
+        Raises the exception from generating the level if it couldn't be generated
+        """
+        if self.loading_error != None:
+            raise self.loading_error
+        self.maze = self.level['maze']
+        self.pathfinder = self.level['pathfinder']
+        self.line_of_sight = LineOfSight(self.maze)
+        self.enemy_hash = SpatialHash(self.maze.tile_size)
+        if self.batched_enemies:
+            self.enemy_store = EnemyStore(self)
+        if self.gpu_tilemap:
+            self.window.load_tilemap(self.level['tilemap'], self.maze.tile_size)
+        # The player and treasure are created here as their animations can't be created outside of the main thread
+        self.player = Player(self, self.level['player_loc'], (14, 20), 2, 100)
+        self.treasure = Treasure(self)
+        self.level = None
+
+    def update_loading(self):
+        """
+        Keeps the transition closed until the level has been generated and then starts the game
+        """
+        # Only checks whether the game has been closed as there is nothing to control yet
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+
+        # Starts the game once the level has been generated. The time is reset so the transition opens from the start
+        if not self.loading_thread.is_alive():
+            self.loading_thread = None
+            self.start_level()
+            self.last_time = time.time()
+
+        # Draws the closed transition over the screen along with a bar showing how much of the maze has been generated
+        self.display.fill((0, 0, 0, 0) if self.gpu_tilemap else (35, 72, 39))
+        self.larger_display.fill((0, 0, 0))
+        pygame.draw.rect(self.larger_display, (172, 116, 27), (self.larger_display.get_width() // 2 - 200, self.larger_display.get_height() - 100, 400 * self.loading_progress, 10))
+        self.light_map.fill((0, 0, 0))
+        self.window.update(uniforms={
+            'screen_texture': self.display, 'ldisplay_texture': self.larger_display, 'light_map': self.light_map, 
+            'time': self.time, 'daylight': self.get_daylight(), 'screen': 0, 'tilemap': 0
+            })
+
     def glow(self, pos, color, radius):
         """
         Adds a light to a given position with a given radius and colour
@@ -299,10 +418,24 @@ class Game:
         """
         top_left_loc = self.maze.get_loc(self.camera_displacement)
         bottom_right_loc = self.maze.get_loc((self.camera_displacement[0] + self.display.get_width(), self.camera_displacement[1] + self.display.get_height()))
-        top_left_loc = (max(0, top_left_loc[0]), max(0, top_left_loc[1]))
-        bottom_right_loc = (min(self.maze.resolution[0], bottom_right_loc[0]), min(self.maze.resolution[1], bottom_right_loc[1]))
+        # Keeps the locations within the maze unless the maze is endless
+        if self.maze.resolution != None:
+            top_left_loc = (max(0, top_left_loc[0]), max(0, top_left_loc[1]))
+            bottom_right_loc = (min(self.maze.resolution[0], bottom_right_loc[0]), min(self.maze.resolution[1], bottom_right_loc[1]))
         return top_left_loc, bottom_right_loc
 
+    def update_enemies(self):
+        """
+        Updates the enemies which are due an update this frame
+        Enemies off of the screen are updated less often unless enemy_lod is turned off, in which case every enemy counts as being on the screen
+        """
+        enemies = get_due_enemies(self.enemies, self.maze, self.get_screen_border() if self.enemy_lod else None, self.dt)
+        if self.enemy_store != None:
+            self.enemy_store.update(enemies)
+        else:
+            for enemy in enemies:
+                enemy.update()
+
     def handle_events(self):
         """
         Handles all pygame events such as button presses
@@ -353,9 +486,11 @@ class Game:
         """
         Spawns an enemy in a random location
         """
-        # Gets a spawn location off of the screen
+        # Gets a spawn location off of the screen which the player can be reached from. No enemy is spawned if one can't be found
         top_left_loc, bottom_right_loc = self.get_screen_border()
-        loc = self.maze.get_random_loc("path", (top_left_loc, bottom_right_loc), 'outside')
+        loc = self.maze.get_random_loc("path", (top_left_loc, bottom_right_loc), 'outside', reachable_from=self.player.get_feet_loc())
+        if loc == None:
+            return
 
         # Calculates how many enemies there are of each colour currently alive
         colors = {'red': 0, 'blue': 0, 'purple': 0}
@@ -364,7 +499,7 @@ class Game:
 
         # Sorts the colours and picks the lowest one before spawning the enemy
         color = sorted(list(colors), key=lambda color: colors[color])[0] if color == None else color
-        self.enemies.append(Enemy(self, loc, (16, 16), random.uniform(1, 2), 30, color))
+        self.enemies.append((BatchedEnemy if self.enemy_store != None else Enemy)(self, loc, (16, 16), random.uniform(1, 2), 30, color))
 
     def spawn_enemies(self):
         """
@@ -426,7 +561,7 @@ class Game:
                 self.tutorial.remove(tutorial)
 
         elif tutorial['name'] == "treasure":
-            if self.maze.tiles[self.maze.get_loc(self.player.get_center())] in self.maze.get_neighbours(self.maze.tiles[self.treasure.loc], diagonals=True):
+            if self.maze.get_loc(self.player.get_center()) in self.maze.get_neighbour_locs(self.treasure.loc, diagonals=True):
                 self.tutorial.remove(tutorial)
 
         elif tutorial['name'] in ["dash_attack", "spiral_attack", "explosion_attack"]:
@@ -559,12 +694,16 @@ class Game:
         Calls all functions to update the display
         """
         # Clears the display
-        self.display.fill((35, 72, 39))
+        self.display.fill((0, 0, 0, 0) if self.gpu_tilemap else (35, 72, 39))
         self.larger_display.fill((0, 0, 0, 0))
         self.light_map.fill((0, 0, 0))
 
-        # Draws all maze elements
-        self.maze.draw()
+        # Draws all maze elements. The maze is drawn in the shader when using the tilemap, so it's re-uploaded if any tiles have changed
+        if self.gpu_tilemap:
+            if self.maze.tilemap_changed:
+                self.window.load_tilemap(self.maze.get_tilemap(), self.maze.tile_size)
+        else:
+            self.maze.draw()
         self.treasure.draw()
 
         # Updates and draws the particles
@@ -603,14 +742,26 @@ class Game:
             # Blits the transition surface onto the larger display
             self.larger_display.blit(self.transition_surf, (0, 0))
 
+        screen_shake = (0, 0)
         if self.screen_shake[1] > 0 and not (self.paused or self.game_over or self.question_flags['popup']):
             screen_shake = (random.random() * self.screen_shake[0], random.random() * self.screen_shake[0])
-            self.display.blit(self.display, screen_shake)
+            if self.gpu_tilemap:
+                # Moves a copy of the display onto the cleared display as blitting the transparent display onto itself would leave the old image behind
+                display = self.display.copy()
+                self.display.fill((0, 0, 0, 0))
+                self.display.blit(display, screen_shake)
+            else:
+                self.display.blit(self.display, screen_shake)
 
-        self.window.update(uniforms={
+        uniforms = {
             'screen_texture': self.display, 'ldisplay_texture': self.larger_display, 'light_map': self.light_map, 
-            'time': self.time, 'daylight': self.get_daylight(), 'screen': 0
-            })
+            'time': self.time, 'daylight': self.get_daylight(), 'screen': 0, 'tilemap': int(self.gpu_tilemap)
+            }
+        # Passes the position of the screen relative to the top left of the tilemap, which starts at the padding around the maze
+        if self.gpu_tilemap:
+            uniforms['camera'] = tuple(self.camera_displacement[i] + (PADDING * self.maze.tile_size) - int(screen_shake[i]) for i in range(2))
+            uniforms['display_size'] = self.display.get_size()
+        self.window.update(uniforms=uniforms)
 
     def run(self):
         """
@@ -622,6 +773,13 @@ class Game:
             self.last_time = time.time()
             self.time = (self.time + self.dt) % 180
             self.multi = self.dt * 60
+
+            # Waits for the level to finish generating before anything in the game is updated
+            if self.loading_thread != None:
+                self.update_loading()
+                self.clock.tick(self.fps)
+                continue
+
             if len(self.tutorial) != 0:
                 self.update_tutorial()
             if not self.paused and not self.game_over and not self.question_flags['popup']:
@@ -641,9 +799,10 @@ class Game:
                 if random.random() < 0.1:
                     top_left_loc, bottom_right_loc = self.get_screen_border()
                     loc = self.maze.get_random_loc("hedge", (top_left_loc, bottom_right_loc))
-                    if random.random() < 0.1:
-                        ParticleHandler.create_particle("bee", self, ((loc[0] * self.maze.tile_size) + (self.maze.tile_size // 2),  (loc[1] * self.maze.tile_size) + (self.maze.tile_size // 4)), speed=random.uniform(0.1, 0.5))
-                    ParticleHandler.create_particle("leaf", self, ((loc[0] * self.maze.tile_size) + (self.maze.tile_size // 2),  (loc[1] * self.maze.tile_size) + (self.maze.tile_size // 4)), speed=random.uniform(0.1, 0.9))
+                    if loc != None:
+                        if random.random() < 0.1:
+                            ParticleHandler.create_particle("bee", self, ((loc[0] * self.maze.tile_size) + (self.maze.tile_size // 2),  (loc[1] * self.maze.tile_size) + (self.maze.tile_size // 4)), speed=random.uniform(0.1, 0.5))
+                        ParticleHandler.create_particle("leaf", self, ((loc[0] * self.maze.tile_size) + (self.maze.tile_size // 2),  (loc[1] * self.maze.tile_size) + (self.maze.tile_size // 4)), speed=random.uniform(0.1, 0.9))
 
                 # Updates all animations. This isn't done in update display as some logic relies on the animation states
                 AnimationHandler.update(self.dt)
@@ -656,9 +815,10 @@ class Game:
 
                 # Updates the player and the enemies if the player isn't dead
                 if not self.player.animation.current_animation == "death":
+                    self.player.set_time_step(self.dt)
                     self.player.update()
-                    for enemy in self.enemies:
-                        enemy.update()
+                    self.update_enemies()
+                    self.path_scheduler.update()
 
                 # Ends the game if the player's death animation is over
                 elif self.player.animation.done:
@@ -673,6 +833,10 @@ class Game:
                 self.camera_displacement[0] = int(self.player.pos[0] - (self.display.get_width() // 2))
                 self.camera_displacement[1] = int(self.player.pos[1] - (self.display.get_height() // 2))
 
+                # Removes the chunks of an endless maze which are now far away from the camera
+                if self.endless:
+                    self.maze.update()
+
             # Decrements the transition timer and draws the transition   
             self.transition_timer = min(self.transition_timer + self.dt, TRANSITION_DURATION)
 
@@ -689,5 +853,7 @@ class Game:
             ParticleHandler.kill_particle(particle)
         for animation in AnimationHandler.animations.copy():
             AnimationHandler.kill_animation(animation)
+        self.window.release_tilemap()
+        self.path_scheduler.close()
         pygame.mixer.stop()
         return "main_menu"
\ No newline at end of file
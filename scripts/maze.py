@@ -1,232 +1,927 @@
+import os
 import random
+import math
+import struct
+import zlib
 
 import pygame
 
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+
+# This is where generated mazes are saved so they can be loaded again instead of being regenerated
+MAZE_CACHE_PATH = "assets/maze_cache"
+# The header at the start of each saved maze: version, maze width, maze height, number of flower variants and number of values in the flower data
+MAZE_CACHE_HEADER = "<HIIII"
+MAZE_CACHE_VERSION = 1
+
+# These are the codes used to store each type of tile in the maze grid
+VOID = 0
+HEDGE = 1
+PATH = 2
+TILE_TYPES = (None, "hedge", "path")
+TILE_CODES = {"hedge": HEDGE, "path": PATH}
+# This is how many steps the maze generation algorithms take between each time they report their progress
+GENERATION_STEPS_PER_YIELD = 1000
+# This is how many tiles of padding surround the maze. The inner ring becomes the hedge border and the outer ring is left empty
+PADDING = 2
+# This is the width and height in tiles of each of the pre-drawn chunks of the maze
+CHUNK_SIZE = 8
+# This is the maximum number of pre-drawn chunks that are kept before the least recently drawn are removed
+MAX_CHUNK_SURFS = 64
+# This is how many tile variants are in each row of the atlas used to draw the maze in the shader
+ATLAS_COLUMNS = 32
+# This is how many random tiles are tried when finding a random location which can be reached from another location
+RANDOM_LOC_ATTEMPTS = 20
+# These are the offsets of the neighbours of a tile in the order that they are checked
+NEIGHBOUR_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAGONAL_OFFSETS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+# These are the bits that represent a hedge on the right, left, bottom and top of a tile in its autotile mask
+AUTOTILE_BITS = (1, 2, 4, 8)
+# This is the autotile mask of each tile variant in the order of the tile images
+AUTOTILE_MASKS = (15, 7, 14, 11, 13, 12, 3, 8, 1, 4, 2, 9, 10, 5, 6, 0)
+# Translation tables that turn tile codes into the bit for a hedge on one side and turn autotile masks into image indexes
+HEDGE_BIT_TABLES = tuple(bytes(bit if code == HEDGE else 0 for code in range(256)) for bit in AUTOTILE_BITS)
+AUTOTILE_TABLE = bytes(AUTOTILE_MASKS.index(mask) if mask < 16 else 0 for mask in range(256))
+# These are the image indexes of tiles which only have hedges on opposite sides (top and bottom or left and right)
+OPPOSITE_HEDGE_INDEXES = (AUTOTILE_MASKS.index(12), AUTOTILE_MASKS.index(3))
+
+class DisjointSet:
+    """
+    A union-find structure over the indexes of the maze grid which keeps track of which cells are connected to each other
+    """
+    def __init__(self, size):
+        self.parents = array('l', range(size))
+        self.sizes = array('l', [1]) * size
+
+    def find(self, index):
+        """
+        Returns the index at the root of the set that an index is in, shortening the path to the root along the way
+        """
+        while self.parents[index] != index:
+            self.parents[index] = self.parents[self.parents[index]]
+            index = self.parents[index]
+        return index
+
+    def union(self, index_1, index_2):
+        """
+        Joins the sets that two indexes are in, returning False if they were already in the same set
+        """
+        root_1, root_2 = self.find(index_1), self.find(index_2)
+        if root_1 == root_2:
+            return False
+
+        # Attaches the smaller set to the larger one so the paths to the roots stay short
+        if self.sizes[root_1] < self.sizes[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.parents[root_2] = root_1
+        self.sizes[root_1] += self.sizes[root_2]
+        return True
+
+
+class CandidateSet:
+    """
+    A set of tile locations which random locations can be taken out of in constant time
+    """
+    def __init__(self, locs=()):
+        self.locs = []
+        self.positions = {}
+        for loc in locs:
+            self.add(loc)
+
+    def __len__(self):
+        return len(self.locs)
+
+    def add(self, loc):
+        """
+        Adds a location to the set if it isn't already in it
+        """
+        if loc not in self.positions:
+            self.positions[loc] = len(self.locs)
+            self.locs.append(loc)
+
+    def discard(self, loc):
+        """
+        Removes a location from the set by moving the last location into its place
+        """
+        if loc in self.positions:
+            position = self.positions.pop(loc)
+            last = self.locs.pop()
+            if position != len(self.locs):
+                self.locs[position] = last
+                self.positions[last] = position
+
+    def pop_random(self, rng=random):
+        """
+        Removes and returns a random location from the set
+        """
+        loc = self.locs[rng.randrange(len(self.locs))]
+        self.discard(loc)
+        return loc
+
+
+class TileView(Mapping):
+    """
+    A read-only view of the maze grid which returns tiles in the format: {'loc', 'type', 'img_index'}
+    """
+    def __init__(self, maze):
+        self.maze = maze
+
+    def __getitem__(self, loc):
+        code = self.maze.get_code(loc)
+        if code == VOID:
+            raise KeyError(loc)
+        return {'loc': (int(loc[0]), int(loc[1])), 'type': TILE_TYPES[code], 'img_index': self.maze.img_indexes[self.maze.get_index(loc)]}
+
+    def __contains__(self, loc):
+        return self.maze.get_code(loc) != VOID
+
+    def __iter__(self):
+        for index, code in enumerate(self.maze.types):
+            if code != VOID:
+                yield self.maze.get_loc_from_index(index)
+
+    def __len__(self):
+        return len(self.maze.types) - self.maze.types.count(VOID)
+
+
 class Maze:
-    def __init__(self, game, tile_size, resolution):
+    def __init__(self, game, tile_size, resolution, seed=None):
         self.game = game
         self.tile_size = tile_size
-        self.tiles = {}
         self.resolution = resolution
         self.flowers = {}
+        # The random number generator used for picking random locations in the maze
+        self.seed = seed
+        self.random = random.Random(seed)
+        # The location that the top left tile of the maze is drawn and collided with at, which is only moved for the chunks of an endless maze
+        self.origin = (0, 0)
+
+        # The grid is stored as flat arrays of tile codes and image indexes with padding around the edges
+        self.width = resolution[0] + PADDING * 2
+        self.height = resolution[1] + PADDING * 2
+        self.types = bytearray(self.width * self.height)
+        self.img_indexes = bytearray(self.width * self.height)
+        self.tiles = TileView(self)
+        # Sorted x coordinates of the tiles of each type in each row. This is built once the maze has been generated
+        self.locations = None
+        # Pre-drawn surfaces of chunks of the maze, ordered from least to most recently drawn
+        self.chunk_surfs = OrderedDict()
+        # Whether the tiles have changed since the tilemap was last uploaded to the shader
+        self.tilemap_changed = False
+        # The locations of the tiles changed with change_tile in the order they were changed, so anything worked out from the tiles can tell what is out of date
+        self.changed_locs = []
+        # The label of the connected component of path tiles that each tile in the grid is in, with 0 for tiles that aren't paths, and the number of tiles in each component
+        # These are built once the maze has been generated
+        self.components = None
+        self.component_sizes = {}
+        self.next_component = 1
+        # The rects of the hedges around each tile which entities collide with. This is built once the maze has been generated
+        self.hedge_rects = {}
+        self.collision_rects = None
 
     def get_loc(self, pos):
         """
         Gets the tile location of a given position
         """
         return (int(pos[0] / self.tile_size), int(pos[1] / self.tile_size))
-    
+
+    def get_index(self, loc):
+        """
+        Gets the index of a tile location within the grid arrays
+        """
+        return int((loc[1] + PADDING) * self.width + loc[0] + PADDING)
+
+    def get_loc_from_index(self, index):
+        """
+        Gets the tile location of an index within the grid arrays
+        """
+        return (index % self.width - PADDING, index // self.width - PADDING)
+
+    def get_code(self, loc):
+        """
+        Gets the code of the tile at a location or VOID if the location is outside the grid
+        """
+        if -PADDING <= loc[0] < self.resolution[0] + PADDING and -PADDING <= loc[1] < self.resolution[1] + PADDING:
+            return self.types[self.get_index(loc)]
+        return VOID
+
+    def get_type(self, loc):
+        """
+        Gets the type of the tile at a location or None if there is no tile there
+        """
+        return TILE_TYPES[self.get_code(loc)]
+
+    def set_type(self, loc, type):
+        """
+        Sets the type of the tile at a location
+        """
+        index = self.get_index(loc)
+        # Moves the location between the location indexes of the old and new types
+        if self.locations != None and self.types[index] != TILE_CODES[type]:
+            if self.types[index] != VOID:
+                row = self.locations[self.types[index]][loc[1] + 1]
+                row.pop(bisect_left(row, loc[0]))
+            insort(self.locations[TILE_CODES[type]][loc[1] + 1], loc[0])
+        self.types[index] = TILE_CODES[type]
+
+    def index_locations(self):
+        """
+        Builds an index of the locations of each type of tile, stored as a sorted list of x coordinates for each row of the maze and its border
+        """
+        self.locations = {HEDGE: [], PATH: []}
+        for y in range(-1, self.resolution[1] + 1):
+            row = self.types[self.get_index((-1, y)):self.get_index((self.resolution[0], y)) + 1]
+            for code in self.locations:
+                self.locations[code].append([x for x, tile_code in enumerate(row, -1) if tile_code == code])
+
+    def label_components(self):
+        """
+        Gives every path tile the label of the connected component of path tiles that it is in
+        """
+        self.components = array('l', [0]) * len(self.types)
+        self.component_sizes = {}
+        for index, code in enumerate(self.types):
+            if code == PATH and self.components[index] == 0:
+                self.fill_component(index, self.next_component)
+                self.next_component += 1
+
+    def fill_component(self, index, label):
+        """
+        Gives a label to every path tile connected to the tile at an index which doesn't already have that label, taking them out of their old components
+        """
+        offsets = (1, -1, self.width, -self.width)
+        self.component_sizes.setdefault(label, 0)
+        stack = [index]
+        while len(stack) != 0:
+            index = stack.pop()
+            if self.types[index] != PATH or self.components[index] == label:
+                continue
+
+            # Moves the tile from its old component into the new one, removing the old component if it is now empty
+            old_label = self.components[index]
+            if old_label != 0:
+                self.component_sizes[old_label] -= 1
+                if self.component_sizes[old_label] == 0:
+                    del self.component_sizes[old_label]
+            self.components[index] = label
+            self.component_sizes[label] += 1
+            stack.extend(index + offset for offset in offsets)
+
+    def update_components(self, loc):
+        """
+        Updates the components after the tile at a location has changed
+        A new path joins the components around it into the largest of them. A new hedge may split its component, so only the pieces which have been cut off are labelled again
+        """
+        index = self.get_index(loc)
+        neighbours = [index + offset for offset in (1, -1, self.width, -self.width) if self.types[index + offset] == PATH]
+        if self.types[index] == PATH:
+            if self.components[index] != 0:
+                return
+            labels = [self.components[neighbour] for neighbour in neighbours]
+            if len(labels) == 0:
+                self.fill_component(index, self.next_component)
+                self.next_component += 1
+            else:
+                label = max(labels, key=self.component_sizes.get)
+                self.fill_component(index, label)
+        else:
+            label = self.components[index]
+            if label == 0:
+                return
+            self.components[index] = 0
+            self.component_sizes[label] -= 1
+            if self.component_sizes[label] == 0:
+                del self.component_sizes[label]
+            if len(neighbours) > 1:
+                self.split_component(label, neighbours)
+
+    def split_component(self, label, starting_indexes):
+        """
+        Gives a new label to each piece of a component which has been cut off from the rest of it, given the indexes of path tiles around where it may have been cut
+        A search is run from each of the tiles at the same time, one tile each in turn, and searches which meet are joined together
+        A search which runs out of tiles has found the whole of a piece which is cut off. This stops once only one search is left, which keeps the old label
+        So if the tiles are still connected only the tiles between them are searched, and otherwise only the pieces which are cut off are searched much further
+        """
+        offsets = (1, -1, self.width, -self.width)
+        searches = DisjointSet(len(starting_indexes))
+        # The search that first reached each tile, which may since have been joined into another search
+        visited = {}
+        frontiers = {}
+        pieces = {}
+        for search, index in enumerate(starting_indexes):
+            visited[index] = search
+            frontiers[search] = deque([index])
+            pieces[search] = [index]
+
+        while len(frontiers) > 1:
+            for search in list(frontiers):
+                if search not in frontiers or len(frontiers) == 1:
+                    continue
+
+                # Labels the tiles of a search which has run out of tiles as a new component
+                if len(frontiers[search]) == 0:
+                    del frontiers[search]
+                    piece = pieces.pop(search)
+                    for index in piece:
+                        self.components[index] = self.next_component
+                    self.component_sizes[self.next_component] = len(piece)
+                    self.component_sizes[label] -= len(piece)
+                    self.next_component += 1
+                    continue
+
+                index = frontiers[search].popleft()
+                for offset in offsets:
+                    neighbour = index + offset
+                    if self.types[neighbour] != PATH:
+                        continue
+                    if neighbour not in visited:
+                        visited[neighbour] = search
+                        frontiers[search].append(neighbour)
+                        pieces[search].append(neighbour)
+                        continue
+
+                    # Joins this search with the search that reached the tile first if they are different searches
+                    other_search = searches.find(visited[neighbour])
+                    if other_search != search:
+                        searches.union(search, other_search)
+                        root = searches.find(search)
+                        joined = other_search if root == search else search
+                        frontiers[root].extend(frontiers.pop(joined))
+                        pieces[root].extend(pieces.pop(joined))
+                        search = root
+
+    def get_components(self, loc):
+        """
+        Returns the labels of the components that a location is in. A location which isn't a path is in the components of its path neighbours
+        """
+        if self.get_code(loc) == PATH:
+            return {self.components[self.get_index(loc)]}
+        return {self.components[self.get_index(neighbour)] for neighbour in self.get_neighbour_locs(loc, diagonals=False) if self.get_code(neighbour) == PATH}
+
+    def is_reachable(self, starting_loc, destination):
+        """
+        Returns whether there is a path from a starting location to a destination without searching for it
+        """
+        if starting_loc == destination:
+            return True
+        if self.get_code(destination) != PATH:
+            return False
+        return self.components[self.get_index(destination)] in self.get_components(starting_loc)
+
+    def change_tile(self, loc, type):
+        """
+        Changes the type of a tile after the maze has been generated and re-tiles the tiles around it
+        """
+        self.set_type(loc, type)
+        self.autotile((loc[0] - 1, loc[1] - 1), (loc[0] + 1, loc[1] + 1))
+        if self.collision_rects != None:
+            self.build_collision_rects((loc[0] - 1, loc[1] - 1), (loc[0] + 1, loc[1] + 1))
+        self.clear_chunk_surfs((loc[0] - 1, loc[1] - 1), (loc[0] + 1, loc[1] + 1))
+        if self.components != None:
+            self.update_components(loc)
+        self.tilemap_changed = True
+        self.changed_locs.append(loc)
+
+    def autotile(self, top_left_loc=None, bottom_right_loc=None):
+        """
+        Changes the variant of each tile based on which of its sides are hedges
+        Allows you to optionally define two corner locations so only the tiles between them are re-tiled
+        """
+        # Finds the spans of the grid arrays that need re-tiling. Only tiles whose neighbours are all within the grid can be tiled
+        if top_left_loc == None:
+            spans = [(self.get_index((-1, -1)), self.get_index(self.resolution) + 1)]
+        else:
+            left = max(top_left_loc[0], -1)
+            right = min(bottom_right_loc[0], self.resolution[0])
+            spans = [(self.get_index((left, y)), self.get_index((right, y)) + 1) for y in range(max(top_left_loc[1], -1), min(bottom_right_loc[1], self.resolution[1]) + 1) if left <= right]
+
+        for start, end in spans:
+            # Builds a 4 bit mask for every tile in the span at once by turning the neighbours on each side into hedge bits
+            # The bits for each side never overlap so the sides can be combined as large integers
+            mask = 0
+            for offset, table in zip((1, -1, self.width, -self.width), HEDGE_BIT_TABLES):
+                mask |= int.from_bytes(self.types[start + offset:end + offset].translate(table), 'big')
+
+            # Maps each mask to the image index of its tile variant
+            self.img_indexes[start:end] = mask.to_bytes(end - start, 'big').translate(AUTOTILE_TABLE)
+
+    def is_path(self, loc):
+        """
+        Returns whether the tile at a location is a path
+        """
+        return self.get_code(loc) == PATH
+
     def get_tile(self, pos):
         """
         Gets the tile at a position
         """
         return self.tiles[self.get_loc(pos)]
 
+    def get_neighbour_locs(self, loc, diagonals=True):
+        """
+        Gets the locations of all the neighbouring tiles around a given location
+        """
+        offsets = NEIGHBOUR_OFFSETS + DIAGONAL_OFFSETS if diagonals else NEIGHBOUR_OFFSETS
+        neighbours = []
+        for offset in offsets:
+            neighbour = (loc[0] + offset[0], loc[1] + offset[1])
+            if self.get_code(neighbour) != VOID:
+                neighbours.append(neighbour)
+        return neighbours
+
     def get_neighbours(self, tile, diagonals=True):
         """
         Gets all the neighbouring tiles around a given tile
         """
-        neighbours = []
-        loc = tile['loc']
-
-        # Gets the neighbours to the left and right
-        for x in (1, -1):
-            if (loc[0] + x, loc[1]) in self.tiles:
-                neighbours.append(self.tiles[(loc[0] + x, loc[1])])
-        
-        # Gets the neighbours on the top and bottom
-        for y in (1, -1):
-            if (loc[0], loc[1] + y) in self.tiles:
-                neighbours.append(self.tiles[(loc[0], loc[1] + y)])
-
-        # Retrieves the diagonal neighbours
-        if diagonals:
-            for x in (1, -1):
-                for y in (1, -1):
-                    if (loc[0] + x, loc[1] + y) in self.tiles:
-                        neighbours.append(self.tiles[(loc[0] + x, loc[1] + y)])
+        return [self.tiles[loc] for loc in self.get_neighbour_locs(tile['loc'], diagonals)]
 
-        return neighbours
-    
-    def get_neighbour_rects(self, tile, diagonals=True):
+    def get_neighbour_rects(self, loc, diagonals=True):
         """
-        Returns rects for the hedge neighbours of a given tile
+        Returns rects for the hedge neighbours of a given tile location
         """
         rects = []
-        for neighbour in self.get_neighbours(tile, diagonals):
-            if neighbour['type'] == "hedge":
-                rects.append(pygame.Rect(neighbour['loc'][0] * self.tile_size, neighbour['loc'][1] * self.tile_size, self.tile_size, self.tile_size))
+        for neighbour in self.get_neighbour_locs(loc, diagonals):
+            if self.get_code(neighbour) == HEDGE:
+                rects.append(pygame.Rect(neighbour[0] * self.tile_size, neighbour[1] * self.tile_size, self.tile_size, self.tile_size))
         return rects
-    
-    def get_hedge_sides(self, tile):
+
+    def build_collision_rects(self, top_left_loc=None, bottom_right_loc=None):
         """
-        Returns a list of the sides of a given tile which are hedges
+        Works out the rects of the hedges around each tile so they don't need to be created when entities collide with them
+        Allows you to optionally define two corner locations so only the tiles between them are updated
         """
-        sides = []
-        neighbours = self.get_neighbours(tile, diagonals=False)
+        if self.collision_rects == None:
+            self.collision_rects = [()] * len(self.types)
+        if top_left_loc == None:
+            top_left_loc, bottom_right_loc = (-1, -1), self.resolution
+        offsets = [offset[1] * self.width + offset[0] for offset in NEIGHBOUR_OFFSETS + DIAGONAL_OFFSETS]
 
-        # Checks each of the neighbours to see whether they are a hedge and what side they are on
-        for neighbour in neighbours:
-            if neighbour['type'] == "hedge":
-                if neighbour['loc'][0] > tile['loc'][0]:
-                    sides.append("right")
-                elif neighbour['loc'][0] < tile['loc'][0]:
-                    sides.append("left")
-                elif neighbour['loc'][1] > tile['loc'][1]:
-                    sides.append("bottom")
+        # Creates a rect for each hedge. These are shared between the neighbouring tiles so there is only one rect per hedge
+        for y in range(max(top_left_loc[1] - 1, -1), min(bottom_right_loc[1] + 1, self.resolution[1]) + 1):
+            for x in range(max(top_left_loc[0] - 1, -1), min(bottom_right_loc[0] + 1, self.resolution[0]) + 1):
+                index = self.get_index((x, y))
+                if self.types[index] == HEDGE:
+                    if index not in self.hedge_rects:
+                        self.hedge_rects[index] = pygame.Rect((x + self.origin[0]) * self.tile_size, (y + self.origin[1]) * self.tile_size, self.tile_size, self.tile_size)
                 else:
-                    sides.append("top")
+                    self.hedge_rects.pop(index, None)
 
+        # Stores the rects of the hedge neighbours of each tile in the same order as get_neighbour_rects
+        for y in range(max(top_left_loc[1], -1), min(bottom_right_loc[1], self.resolution[1]) + 1):
+            for x in range(max(top_left_loc[0], -1), min(bottom_right_loc[0], self.resolution[0]) + 1):
+                index = self.get_index((x, y))
+                self.collision_rects[index] = tuple(self.hedge_rects[index + offset] for offset in offsets if self.types[index + offset] == HEDGE)
+
+    def get_collision_rects(self, loc):
+        """
+        Returns the rects of the hedges around a tile location. These are shared so they must not be changed
+        This is called for every entity each frame so the index is worked out here rather than with get_code
+        """
+        if -PADDING <= loc[0] < self.resolution[0] + PADDING and -PADDING <= loc[1] < self.resolution[1] + PADDING:
+            index = (loc[1] + PADDING) * self.width + loc[0] + PADDING
+            if self.types[index] != VOID:
+                return self.collision_rects[index]
+        return ()
+
+    def get_hedge_sides(self, loc):
+        """
+        Returns a list of the sides of a given tile location which are hedges
+        """
+        sides = []
+        # Checks each of the neighbours to see whether they are a hedge and what side they are on
+        for offset, side in zip(NEIGHBOUR_OFFSETS, ("right", "left", "bottom", "top")):
+            if self.get_code((loc[0] + offset[0], loc[1] + offset[1])) == HEDGE:
+                sides.append(side)
         return sides
     
-    def get_random_loc(self, type, border_limits=None, border_function='inside'):
+    def get_location_segments(self, type, border_limits, border_function, outer_limits=None):
+        """
+        Returns the rows of the location index for a type of tile that are within the limits, along with the slice of each row which is within the limits
+        When finding tiles outside of the limits, only the tiles within the outer limits are used which defaults to the whole maze without its border
+        """
+        rows = self.locations[TILE_CODES[type]]
+        segments = []
+
+        # Finds the slice of each row which is between the limits
+        if border_function == 'inside':
+            for y in range(max(border_limits[0][1], -1), min(border_limits[1][1], self.resolution[1]) + 1):
+                row = rows[y + 1]
+                start = bisect_left(row, border_limits[0][0])
+                segments.append((y, row, start, max(start, bisect_right(row, border_limits[1][0]))))
+
+        # Finds the slices of each row which are on the maze but not strictly between the limits
+        elif border_function == 'outside':
+            if outer_limits == None:
+                outer_limits = ((0, 0), (self.resolution[0] - 1, self.resolution[1] - 1))
+            for y in range(max(outer_limits[0][1], -1), min(outer_limits[1][1], self.resolution[1]) + 1):
+                row = rows[y + 1]
+                start = bisect_left(row, outer_limits[0][0])
+                end = max(start, bisect_right(row, outer_limits[1][0]))
+                if border_limits[0][1] < y < border_limits[1][1] and border_limits[0][0] < border_limits[1][0]:
+                    segments.append((y, row, start, max(start, min(end, bisect_right(row, border_limits[0][0])))))
+                    segments.append((y, row, min(end, max(start, bisect_left(row, border_limits[1][0]))), end))
+                else:
+                    segments.append((y, row, start, end))
+
+        return segments
+
+    def get_random_loc(self, type, border_limits=None, border_function='inside', rng=None, reachable_from=None):
         """
-        Returns a random tile location of a specified type
+        Returns a random tile location of a specified type or None if there are no tiles of that type
         Allows you to optionally define two border locations for where the tile should fit between
+        Uses the maze's own random number generator unless another one is given
+        Allows you to optionally give a location which there must be a path from to the tile, giving up after RANDOM_LOC_ATTEMPTS tiles have been tried
         """
+        if rng == None:
+            rng = self.random
+
         # Sets default border limits to be the top left and bottom right of the screen
         if border_limits == None:
             border_limits = ((0, 0), self.resolution)
 
-        # Generates a random location within the limits and keeps finding new locations until one is found which matches the type
-        if border_function == 'inside':
-            loc = (random.randint(border_limits[0][0], border_limits[1][0]), random.randint(border_limits[0][1], border_limits[1][1]))
-            while self.tiles[loc]['type'] != type:
-                loc = (random.randint(border_limits[0][0], border_limits[1][0]), random.randint(border_limits[0][1], border_limits[1][1]))
+        # Counts how many tiles of the type there are in each row within the limits and picks one at random
+        segments = self.get_location_segments(type, border_limits, border_function)
+        total = sum(end - start for y, row, start, end in segments)
+        if total == 0:
+            return None
 
-        # Generates a random location on te screen and keeps finding new locations until one is found which matches the type and is outside of the limits
-        elif border_function == 'outside':
-            loc = (random.randint(0, self.resolution[0] - 1), random.randint(0, self.resolution[0] - 1))
-            while self.tiles[loc]['type'] != type or (loc[0] > border_limits[0][0] and loc[0] < border_limits[1][0] and loc[1] > border_limits[0][1] and loc[1] < border_limits[1][1]):
-                loc = (random.randint(0, self.resolution[0] - 1), random.randint(0, self.resolution[0] - 1))
+        for i in range(RANDOM_LOC_ATTEMPTS if reachable_from != None else 1):
+            choice = rng.randrange(total)
 
-        return loc
-                
-    
-    def draw(self):
+            # Finds the row that the chosen tile is in
+            for y, row, start, end in segments:
+                if choice < end - start:
+                    loc = (row[start + choice], y)
+                    break
+                choice -= end - start
+
+            if reachable_from == None or self.is_reachable(reachable_from, loc):
+                return loc
+        return None
+
+    def draw_tiles(self, surf, top_left_loc, bottom_right_loc, offset):
         """
-        Draws all the tiles visible on the screen
+        Draws the tiles and flowers between two corner locations onto a surface, where the offset is the position on the surface of location (0, 0)
         """
-        top_left_loc = self.get_loc(self.game.camera_displacement)
-        for x in range(-1, self.game.display.get_width() // self.tile_size + 2):
-            for y in range(-1, self.game.display.get_height() // self.tile_size + 2):
-                loc = (top_left_loc[0] + x, top_left_loc[1] + y)
+        for x in range(top_left_loc[0], bottom_right_loc[0] + 1):
+            for y in range(top_left_loc[1], bottom_right_loc[1] + 1):
+                loc = (x, y)
+                pos = (x * self.tile_size + offset[0], y * self.tile_size + offset[1])
+
+                # Checks if the tile exists and blits it to the surface if it does
+                code = self.get_code(loc)
+                if code != VOID:
+                    surf.blit(self.game.images[TILE_TYPES[code]][self.img_indexes[self.get_index(loc)]], pos)
 
-                # Checks if the tile exists and blits it to the screen if it does
-                if loc in self.tiles:
-                    tile = self.tiles[loc]
-                    self.game.display.blit(self.game.images[tile['type']][tile['img_index']], (loc[0] * self.tile_size - self.game.camera_displacement[0], loc[1] * self.tile_size - self.game.camera_displacement[1]))
-                
                 # Checks if there's any flowers at that location and blits the flowers
                 if loc in self.flowers:
                     for flower_index in self.flowers[loc]:
-                        self.game.display.blit(self.game.images['flowers'][flower_index], (loc[0] * self.tile_size - self.game.camera_displacement[0], loc[1] * self.tile_size - self.game.camera_displacement[1]))
+                        surf.blit(self.game.images['flowers'][flower_index], pos)
+
+    def get_chunk_surf(self, chunk_loc):
+        """
+        Returns the pre-drawn surface of a chunk, drawing it first if it hasn't been drawn yet
+        """
+        if chunk_loc in self.chunk_surfs:
+            self.chunk_surfs.move_to_end(chunk_loc)
+            return self.chunk_surfs[chunk_loc]
+
+        # Draws the tiles within the chunk onto a transparent surface
+        surf = pygame.Surface((CHUNK_SIZE * self.tile_size, CHUNK_SIZE * self.tile_size), pygame.SRCALPHA)
+        top_left_loc = (chunk_loc[0] * CHUNK_SIZE, chunk_loc[1] * CHUNK_SIZE)
+        self.draw_tiles(surf, top_left_loc, (top_left_loc[0] + CHUNK_SIZE - 1, top_left_loc[1] + CHUNK_SIZE - 1), (-top_left_loc[0] * self.tile_size, -top_left_loc[1] * self.tile_size))
+
+        # Adds the surface to the chunks and removes the least recently drawn chunk if there are too many
+        self.chunk_surfs[chunk_loc] = surf
+        if len(self.chunk_surfs) > MAX_CHUNK_SURFS:
+            self.chunk_surfs.popitem(last=False)
+        return surf
+
+    def clear_chunk_surfs(self, top_left_loc, bottom_right_loc):
+        """
+        Removes the pre-drawn surfaces of all chunks between two corner locations so they are redrawn
+        """
+        for chunk_x in range(top_left_loc[0] // CHUNK_SIZE, bottom_right_loc[0] // CHUNK_SIZE + 1):
+            for chunk_y in range(top_left_loc[1] // CHUNK_SIZE, bottom_right_loc[1] // CHUNK_SIZE + 1):
+                self.chunk_surfs.pop((chunk_x, chunk_y), None)
+
+    def get_tilemap(self):
+        """
+        Returns the maze as an atlas image of every tile variant and a grid of which variant each tile uses so it can be drawn in the shader
+        A variant is a tile image along with the flowers on top of it and variant 0 is left empty for locations without a tile
+        """
+        variants = {None: 0}
+        data = bytearray(len(self.types) * 2)
 
+        # Finds the variant of each tile and stores its index as 2 bytes in the grid
+        for index, code in enumerate(self.types):
+            if code != VOID:
+                variant = (code, self.img_indexes[index], tuple(self.flowers.get(self.get_loc_from_index(index), ())))
+                if variant not in variants:
+                    variants[variant] = len(variants)
+                data[index * 2] = variants[variant] % 256
+                data[index * 2 + 1] = variants[variant] // 256
 
+        # Draws each variant onto the atlas
+        atlas = pygame.Surface((ATLAS_COLUMNS * self.tile_size, math.ceil(len(variants) / ATLAS_COLUMNS) * self.tile_size), pygame.SRCALPHA)
+        for variant, variant_index in variants.items():
+            if variant != None:
+                pos = ((variant_index % ATLAS_COLUMNS) * self.tile_size, (variant_index // ATLAS_COLUMNS) * self.tile_size)
+                atlas.blit(self.game.images[TILE_TYPES[variant[0]]][variant[1]], pos)
+                for flower_index in variant[2]:
+                    atlas.blit(self.game.images['flowers'][flower_index], pos)
 
-def generate_maze(game, tile_size, maze_resolution, removed_tiles):
+        self.tilemap_changed = False
+        return {'atlas': atlas, 'size': (self.width, self.height), 'data': bytes(data), 'atlas_columns': ATLAS_COLUMNS}
+
+    def draw(self):
+        """
+        Draws all the chunks visible on the screen
+        """
+        chunk_width = CHUNK_SIZE * self.tile_size
+        camera_displacement = self.game.camera_displacement
+
+        # Finds the chunks on the screen, skipping any which are completely outside of the maze and its border
+        left = max(camera_displacement[0] // chunk_width, -1 // CHUNK_SIZE)
+        top = max(camera_displacement[1] // chunk_width, -1 // CHUNK_SIZE)
+        right = min((camera_displacement[0] + self.game.display.get_width()) // chunk_width, self.resolution[0] // CHUNK_SIZE)
+        bottom = min((camera_displacement[1] + self.game.display.get_height()) // chunk_width, self.resolution[1] // CHUNK_SIZE)
+
+        for chunk_x in range(left, right + 1):
+            for chunk_y in range(top, bottom + 1):
+                self.game.display.blit(self.get_chunk_surf((chunk_x, chunk_y)), (chunk_x * chunk_width - camera_displacement[0], chunk_y * chunk_width - camera_displacement[1]))
+
+
+def get_maze_cache_path(seed, maze_resolution, removed_tiles, algorithm='dfs'):
     """
-    Uses a Randomised depth first search algorithm to generate a maze
+    Returns the path that a maze generated with a given seed, resolution, number of removed tiles and algorithm is saved at
     """
-    # Creates the maze object
-    maze = Maze(game, tile_size, maze_resolution)
+    return os.path.join(MAZE_CACHE_PATH, f"{seed}_{maze_resolution[0]}x{maze_resolution[1]}_{removed_tiles}_{algorithm}.maze")
 
-    # Fills in the maze with hedges
-    for x in range(maze_resolution[0]):
-        for y in range(maze_resolution[1]):
-            maze.tiles[(x, y)] = {
-                'loc': (x, y),
-                'type': "hedge",
-                'img_index': 0
-            }
+def save_maze(maze, path):
+    """
+    Saves the tiles, tile variants and flowers of a maze to a compressed file
+    """
+    # Flattens the flowers into a list of: x, y, number of flowers, flower indexes
+    flowers = array('h')
+    for loc in maze.flowers:
+        flowers.extend((loc[0], loc[1], len(maze.flowers[loc]), *maze.flowers[loc]))
 
-    # Picks a random starting tile and adds it to the stack
-    starting_tile = maze.tiles[random.choice(list(maze.tiles))]
-    maze_stack = [starting_tile]
+    header = struct.pack(MAZE_CACHE_HEADER, MAZE_CACHE_VERSION, *maze.resolution, len(maze.game.images['flowers']), len(flowers))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(header + zlib.compress(bytes(maze.types) + bytes(maze.img_indexes) + flowers.tobytes()))
 
-    # Keeps looping as long as there are tiles in the stack
-    while len(maze_stack) != 0:
+def load_maze(game, tile_size, path, seed=None):
+    """
+    Loads a maze that was saved with save_maze, returning None if it doesn't match the current version or flower images
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    version, width, height, flower_variants, flower_count = struct.unpack_from(MAZE_CACHE_HEADER, data)
+    if version != MAZE_CACHE_VERSION or flower_variants != len(game.images['flowers']):
+        return None
 
-        # Pops a tile off the stack
-        current_tile = maze_stack.pop()
-        neighbours = []
-        loc = current_tile["loc"]
+    # Copies the tiles and tile variants into a new maze
+    maze = Maze(game, tile_size, (width, height), seed)
+    data = zlib.decompress(data[struct.calcsize(MAZE_CACHE_HEADER):])
+    maze.types[:] = data[:len(maze.types)]
+    maze.img_indexes[:] = data[len(maze.types):len(maze.types) * 2]
+
+    # Rebuilds the flowers dictionary from the flattened list
+    flowers = array('h')
+    flowers.frombytes(data[len(maze.types) * 2:])
+    i = 0
+    while i < len(flowers):
+        maze.flowers[(flowers[i], flowers[i + 1])] = list(flowers[i + 3:i + 3 + flowers[i + 2]])
+        i += 3 + flowers[i + 2]
+
+    maze.index_locations()
+    maze.build_collision_rects()
+    maze.label_components()
+    return maze
+
+def fill_hedges(maze):
+    """
+    Fills in the maze with hedges
+    """
+    for y in range(maze.resolution[1]):
+        index = maze.get_index((0, y))
+        maze.types[index:index + maze.resolution[0]] = bytes((HEDGE,)) * maze.resolution[0]
+
+def get_cells(maze, starting_loc):
+    """
+    Returns the indexes of the cells of a maze carved from a starting location, which are the tiles an even number of tiles away from it in both directions
+    """
+    return [maze.get_index((x, y)) for y in range(starting_loc[1] % 2, maze.resolution[1], 2) for x in range(starting_loc[0] % 2, maze.resolution[0], 2)]
+
+def carve_dfs(maze, rng, starting_loc):
+    """
+    Uses a Randomised depth first search algorithm to carve paths through a maze filled with hedges
+    This is a generator which yields the fraction of the maze that has been carved every GENERATION_STEPS_PER_YIELD steps
+    """
+    # The offsets of the neighbouring cells to the right, left, bottom and top of a cell in the grid
+    offsets = (2, -2, maze.width * 2, -maze.width * 2)
+    cell_count = len(get_cells(maze, starting_loc))
+    carved = 0
+    steps = 0
+
+    # Adds the starting tile to the stack
+    maze_stack = [maze.get_index(starting_loc)]
 
-        # Adds the neighbours to the left and right of the tile
-        for x in (2, -2):
-            if (loc[0] + x, loc[1]) in maze.tiles and maze.tiles[(loc[0] + x, loc[1])]['type'] != "path":
-                neighbours.append((maze.tiles[(loc[0] + x, loc[1])], maze.tiles[(loc[0] + (x / 2), loc[1])]))
+    # Keeps looping as long as there are tiles in the stack
+    while len(maze_stack) != 0:
 
-        # Adds the neighbours to the top and bottom of the tile
-        for y in (2, -2):
-            if (loc[0], loc[1] + y) in maze.tiles and maze.tiles[(loc[0], loc[1] + y)]['type'] != "path":
-                neighbours.append((maze.tiles[(loc[0], loc[1] + y)], maze.tiles[(loc[0], loc[1] + (y / 2))]))
+        # Pops a tile off the stack and finds its neighbours which haven't been carved yet
+        index = maze_stack.pop()
+        neighbours = [offset for offset in offsets if maze.types[index + offset] == HEDGE]
 
         if len(neighbours) != 0:
             # Adds the current tile back to the stack so it can be backtracked along
-            maze_stack.append(current_tile)
-            # Picks a random neighbour to move along
-            neighbour = random.choice(neighbours)
-            # Turns the neighbour into a path as well as the tile required to get there
-            neighbour[0]['type'] = "path"
-            neighbour[1]['type']= "path"
+            maze_stack.append(index)
+            # Picks a random neighbour to move along and turns it into a path as well as the tile required to get there
+            offset = rng.choice(neighbours)
+            maze.types[index + offset] = PATH
+            maze.types[index + offset // 2] = PATH
             # Adds the neighbour to the stack
-            maze_stack.append(neighbour[0])
+            maze_stack.append(index + offset)
+            carved += 1
+
+        steps += 1
+        if steps % GENERATION_STEPS_PER_YIELD == 0:
+            yield carved / cell_count
+    yield 1
+
+def carve_kruskal(maze, rng, starting_loc):
+    """
+    Uses Randomised Kruskal's algorithm to carve paths through a maze filled with hedges, which removes the walls between random cells unless they are already connected
+    Yields its progress in the same way as carve_dfs
+    """
+    # Turns every cell into a path and finds all the walls between them in a random order
+    cells = get_cells(maze, starting_loc)
+    for index in cells:
+        maze.types[index] = PATH
+    walls = [(index, offset) for index in cells for offset in (2, maze.width * 2) if maze.types[index + offset] != VOID]
+    rng.shuffle(walls)
+
+    # Removes each wall if the cells on either side of it aren't connected yet, until all the cells are connected
+    cell_sets = DisjointSet(len(maze.types))
+    joined = 1
+    for steps, (index, offset) in enumerate(walls, 1):
+        if cell_sets.union(index, index + offset):
+            maze.types[index + offset // 2] = PATH
+            joined += 1
+            if joined == len(cells):
+                break
+        if steps % GENERATION_STEPS_PER_YIELD == 0:
+            yield joined / len(cells)
+    yield 1
+
+def carve_wilson(maze, rng, starting_loc):
+    """
+    Uses Wilson's algorithm to carve paths through a maze filled with hedges, which adds loop-erased random walks from each cell to the maze until every cell is in it
+    Unlike depth first search, every possible maze is equally likely to be generated
+    Yields its progress in the same way as carve_dfs
+    """
+    offsets = (2, -2, maze.width * 2, -maze.width * 2)
+    # The direction that each cell was last left in during the current walk. Only the last direction is kept so any loops are erased
+    directions = array('l', [0]) * len(maze.types)
+    cells = get_cells(maze, starting_loc)
+    rng.shuffle(cells)
+
+    # Starts the maze from the starting tile
+    maze.types[maze.get_index(starting_loc)] = PATH
+    added = 1
+    steps = 0
 
+    for cell in cells:
+        # Randomly walks from the cell until it reaches a path, skipping any moves that would leave the maze
+        index = cell
+        while maze.types[index] != PATH:
+            offset = rng.choice(offsets)
+            if maze.types[index + offset] != VOID:
+                directions[index] = offset
+                index += offset
+            steps += 1
+            if steps % GENERATION_STEPS_PER_YIELD == 0:
+                yield added / len(cells)
+
+        # Follows the walk again from the cell and carves it into the maze
+        index = cell
+        while maze.types[index] != PATH:
+            maze.types[index] = PATH
+            maze.types[index + directions[index] // 2] = PATH
+            index += directions[index]
+            added += 1
+    yield 1
+
+# These are the algorithms that can be used to carve the paths of a maze
+MAZE_ALGORITHMS = {'dfs': carve_dfs, 'kruskal': carve_kruskal, 'wilson': carve_wilson}
+
+def carve_maze(maze, rng, starting_loc, algorithm='dfs', progress_callback=None):
+    """
+    Carves paths through a maze filled with hedges using one of the maze algorithms
+    The tiles are changed directly in the grid, so the location index must be built afterwards
+    Allows you to optionally give a function that is called with the fraction of the maze that has been carved each time the algorithm reports its progress
+    """
+    for progress in MAZE_ALGORITHMS[algorithm](maze, rng, starting_loc):
+        if progress_callback != None:
+            progress_callback(progress)
+
+def remove_hedges(maze, removed_tiles, rng, top_left_loc, bottom_right_loc):
+    """
+    Removes a number of hedges between two corner locations to make the maze more open and have more paths through it
+    """
+    # Tiles the maze so the hedges that can be removed can be found from their image index
+    maze.autotile()
+
+    # Finds all the hedges which have hedges on 2 opposite sides as those are the only type of hedges that should be removed
+    candidates = CandidateSet()
+    for y in range(top_left_loc[1], bottom_right_loc[1] + 1):
+        start = maze.get_index((top_left_loc[0], y))
+        end = maze.get_index((bottom_right_loc[0], y)) + 1
+        for x, (code, img_index) in enumerate(zip(maze.types[start:end], maze.img_indexes[start:end]), top_left_loc[0]):
+            if code == HEDGE and img_index in OPPOSITE_HEDGE_INDEXES:
+                candidates.add((x, y))
 
-    # This removes a bunch of hedges to make the maze more open and have more paths through it
     for i in range(removed_tiles):
-        # This finds a random tile and checks whether it has 2 hedges on opposite sides as those are the only type of hedges that should be removed
-        tile = maze.tiles[random.choice(list(maze.tiles))]
-        while not tile['type'] == "hedge" or maze.get_hedge_sides(tile) not in [["bottom", "top"], ["right", "left"]]:
-            tile = maze.tiles[random.choice(list(maze.tiles))]
-        tile['type'] = "path"
-
-    # This generates a bunch of flowers within the maze
-    for i in range(200):
-        # This finds a random tile which is a path
-        tile = maze.tiles[random.choice(list(maze.tiles))]
-        while not tile['type'] == "path":
-            tile = maze.tiles[random.choice(list(maze.tiles))]
+        if len(candidates) == 0:
+            break
+        loc = candidates.pop_random(rng)
+        maze.change_tile(loc, "path")
+
+        # Removing a hedge changes the sides of its neighbours so they are checked again to see whether they can be removed
+        for neighbour in maze.get_neighbour_locs(loc, diagonals=False):
+            if top_left_loc[0] <= neighbour[0] <= bottom_right_loc[0] and top_left_loc[1] <= neighbour[1] <= bottom_right_loc[1] and maze.get_code(neighbour) == HEDGE and maze.img_indexes[maze.get_index(neighbour)] in OPPOSITE_HEDGE_INDEXES:
+                candidates.add(neighbour)
+            else:
+                candidates.discard(neighbour)
+
+def place_flowers(maze, flower_count, rng):
+    """
+    Places a number of flowers on random path tiles within the maze. The locations of the tiles must have been indexed
+    """
+    path_locs = [(x, y) for y, row in enumerate(maze.locations[PATH], -1) for x in row if 0 <= x < maze.resolution[0] and 0 <= y < maze.resolution[1]]
+
+    for i in range(flower_count):
+        # This picks a random tile which is a path
+        loc = rng.choice(path_locs)
 
         # Checks whether the tile already has flowers and if it does, appends to the flowers list or creates a new flowers list if it doesn't
-        if tile['loc'] in maze.flowers:
-            maze.flowers[tile['loc']].append(random.randint(0, len(game.images['flowers']) - 1))
+        if loc in maze.flowers:
+            maze.flowers[loc].append(rng.randint(0, len(maze.game.images['flowers']) - 1))
         else:
-            maze.flowers[tile['loc']] = [random.randint(0, len(game.images['flowers']) - 1)]
-            
-    # Adds borders to the maze
-    for y in range(maze_resolution[1]):
-        for x in (-1, maze_resolution[0]):
-            maze.tiles[(x, y)] = {'loc': (x, y), 'type': "hedge", 'img_index': 0}
-    for x in range(maze_resolution[0] + 2):
-        for y in (-1, maze_resolution[1]):
-            maze.tiles[(x - 1, y)] = {'loc': (x - 1, y), 'type': "hedge", 'img_index': 0}
-
-    # Changes the variant of the tile based on its surrounding tiles
-    # This is a list of the possible combinations that can be had with surrounding walls
-    combinations = (
-        ['right', 'left', 'bottom', 'top'],
-        ['right', 'left', 'bottom'],
-        ['left', 'bottom', 'top'],
-        ['right', 'left', 'top'],
-        ['right', 'bottom', 'top'],
-        ['bottom', 'top'],
-        ['right', 'left'],
-        ['top'],
-        ['right'],
-        ['bottom'],
-        ['left'],
-        ['right', 'top'],
-        ['left', 'top'],
-        ['right', 'bottom'],
-        ['left', 'bottom'],
-        []
-    )
-    for loc in maze.tiles:
-        tile = maze.tiles[loc]        
-        hedge_sides = maze.get_hedge_sides(tile)
-        tile['img_index'] = combinations.index(hedge_sides)
+            maze.flowers[loc] = [rng.randint(0, len(maze.game.images['flowers']) - 1)]
 
-    return maze
+def add_border(maze):
+    """
+    Adds borders to the maze by filling in the inner ring of padding with hedges
+    """
+    for y in range(-1, maze.resolution[1] + 1):
+        for x in (-1, maze.resolution[0]):
+            maze.set_type((x, y), "hedge")
+    for x in range(-1, maze.resolution[0] + 1):
+        for y in (-1, maze.resolution[1]):
+            maze.set_type((x, y), "hedge")
+
+def generate_maze(game, tile_size, maze_resolution, removed_tiles, seed=None, algorithm='dfs', progress_callback=None):
+    """
+    Generates a maze using one of the algorithms in MAZE_ALGORITHMS, which defaults to a Randomised depth first search
+    Generating with the same seed and algorithm always gives the same maze. Mazes generated with a given seed are saved and loaded from then on
+    Allows you to optionally give a function that is called with the fraction of the paths that have been carved while the maze is generated
+    """
+    # Loads the maze if it has already been generated with this seed
+    if seed != None:
+        path = get_maze_cache_path(seed, maze_resolution, removed_tiles, algorithm)
+        if os.path.exists(path):
+            maze = load_maze(game, tile_size, path, seed)
+            if maze != None:
+                return maze
 
+    # Creates the maze object and the random number generator used to generate it
+    maze = Maze(game, tile_size, maze_resolution, seed)
+    rng = random.Random(seed)
+
+    # Fills the maze with hedges and carves the paths from a random starting tile
+    fill_hedges(maze)
+    carve_maze(maze, rng, (rng.randrange(maze_resolution[0]), rng.randrange(maze_resolution[1])), algorithm, progress_callback)
+    remove_hedges(maze, removed_tiles, rng, (0, 0), (maze_resolution[0] - 1, maze_resolution[1] - 1))
+
+    # Indexes the locations of each type of tile so the flowers can be placed on the paths
+    maze.index_locations()
+    place_flowers(maze, 200, rng)
+    add_border(maze)
+
+    # Changes the variant of each tile based on its surrounding tiles now that the borders are in place, works out the hedges each tile collides with and labels the connected paths
+    maze.autotile()
+    maze.build_collision_rects()
+    maze.label_components()
+
+    # Saves the maze so it can be loaded next time it's generated with this seed
+    if seed != None:
+        save_maze(maze, path)
+
+    return maze
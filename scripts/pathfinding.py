@@ -0,0 +1,1017 @@
+import heapq
+import math
+import time
+import multiprocessing
+
+import pygame
+
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor
+
+from scripts.maze import VOID, PATH, PADDING, NEIGHBOUR_OFFSETS
+
+# This is the longest time in seconds that can be spent finding paths for enemies in each frame
+PATH_BUDGET = 0.002
+# This is the width and height in tiles of the clusters that the maze is split into for hierarchical pathfinding
+CLUSTER_SIZE = 10
+# This is the largest number of incremental searches kept for reuse before the least recently used are removed
+MAX_INCREMENTAL_SEARCHES = 64
+# This is the most tiles an incremental search can have searched before a new search is started instead of reusing it
+MAX_INCREMENTAL_SEARCH_TILES = 20000
+# This is the furthest apart in tiles that two locations can be for the line of sight between them to be checked
+MAX_LINE_OF_SIGHT = 16
+# This is the largest number of lines of sight that are kept before they are all cleared
+MAX_LINES_OF_SIGHT = 4096
+# This is the most enemies whose paths are found together by a worker process
+PATH_BATCH_SIZE = 64
+# This is the longest time in seconds that a worker process can take to return a batch of paths before they are found in the game's process instead
+PATH_WORKER_TIMEOUT = 0.25
+
+def find_path(maze, starting_loc, destination):
+    """
+    Uses an A* search to find the shortest path along the paths of a maze from a starting location to a destination
+    Returns the locations along the path, not including the starting location, or None if there is no path
+    Each entry in the frontier is formatted as (cost + Manhattan distance, order added, cost, tile location)
+    """
+    # Initialises the frontier to the starting location. The order the entries were added in stops ties from comparing locations
+    frontier = [(0, 0, 0, starting_loc)]
+    costs = {starting_loc: 0}
+    parents = {starting_loc: None}
+    explored_tiles = set()
+    added = 1
+
+    while len(frontier) != 0:
+        # Takes the entry with the lowest cost off the heap, skipping it if the tile has already been reached more cheaply
+        estimate, order, cost, loc = heapq.heappop(frontier)
+        if loc in explored_tiles:
+            continue
+        explored_tiles.add(loc)
+
+        # Backtracks using the parent of each tile to find the shortest path once the destination has been reached
+        if loc == destination:
+            shortest_path = []
+            while parents[loc] != None:
+                shortest_path.append(loc)
+                loc = parents[loc]
+            shortest_path.reverse()
+            return shortest_path
+
+        # Adds the tile's neighbours to the frontier if the tile is a path and this is the cheapest way found to reach it
+        for neighbour in maze.get_neighbour_locs(loc, diagonals=False):
+            if maze.is_path(neighbour) and cost + 1 < costs.get(neighbour, cost + 2):
+                costs[neighbour] = cost + 1
+                parents[neighbour] = loc
+                heapq.heappush(frontier, (cost + 1 + abs(neighbour[0] - destination[0]) + abs(neighbour[1] - destination[1]), added, cost + 1, neighbour))
+                added += 1
+
+    # If the frontier is empty and the destination has not been found, there must be no possible path to it
+    return None
+
+
+class AStar:
+    """
+    Finds each path with its own A* search
+    """
+    # Whether the pathfinder works on the whole maze at once, which means it can't be used with an endless maze
+    whole_maze = False
+
+    def __init__(self, maze):
+        self.maze = maze
+
+    def get_path(self, starting_loc, destination):
+        """
+        Returns the shortest path from a starting location to a destination or None if there is no path
+        """
+        return find_path(self.maze, starting_loc, destination)
+
+
+class FlowField:
+    """
+    A breadth first search outwards from the destination which gives each path tile its distance from the destination
+    The distances are shared by every path to the same destination, which is found by stepping to the neighbour with the lowest distance
+    The search is only continued as far as it needs to go to reach the starting locations that have been asked for, so it also works in an endless maze
+    """
+    whole_maze = False
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.destination = None
+        self.distances = {}
+        self.frontier = deque()
+
+    def set_destination(self, destination):
+        """
+        Starts a new search from a destination if it has changed
+        """
+        if destination != self.destination:
+            self.destination = destination
+            self.distances = {destination: 0}
+            self.frontier = deque([destination] if self.maze.is_path(destination) else [])
+
+    def expand(self, locs):
+        """
+        Continues the search until it reaches one of the locations or there are no more tiles to search
+        """
+        if any(loc in self.distances for loc in locs):
+            return
+
+        while len(self.frontier) != 0:
+            # Gives each of the tile's neighbours that haven't been reached yet a distance one more than the tile's
+            loc = self.frontier.popleft()
+            reached = False
+            for neighbour in self.maze.get_neighbour_locs(loc, diagonals=False):
+                if neighbour not in self.distances and self.maze.is_path(neighbour):
+                    self.distances[neighbour] = self.distances[loc] + 1
+                    self.frontier.append(neighbour)
+                    reached = reached or neighbour in locs
+            if reached:
+                return
+
+    def get_path(self, starting_loc, destination):
+        """
+        Returns the shortest path from a starting location to a destination or None if there is no path
+        """
+        self.set_destination(destination)
+
+        # A starting location that isn't a path starts from whichever of its neighbours is closest to the destination instead
+        if starting_loc == destination or self.maze.is_path(starting_loc):
+            locs = [starting_loc]
+        else:
+            locs = [neighbour for neighbour in self.maze.get_neighbour_locs(starting_loc, diagonals=False) if self.maze.is_path(neighbour)]
+        self.expand(locs)
+        locs = [loc for loc in locs if loc in self.distances]
+        if len(locs) == 0:
+            return None
+        loc = min(locs, key=self.distances.get)
+
+        # Steps to a neighbour which is one tile closer to the destination until the destination is reached
+        shortest_path = [] if loc == starting_loc else [loc]
+        while self.distances[loc] != 0:
+            for neighbour in self.maze.get_neighbour_locs(loc, diagonals=False):
+                if self.distances.get(neighbour) == self.distances[loc] - 1:
+                    loc = neighbour
+                    break
+            shortest_path.append(loc)
+        return shortest_path
+
+
+class JunctionGraph:
+    """
+    A graph of the maze where the nodes are the junctions and dead ends and the edges are the corridors between them
+    Paths are found with an A* search over the graph and the corridors along the path are then expanded back into tiles, so the tiles in the middle of corridors are never searched
+    This searches about 4 to 10 times fewer locations than the A* search over tiles, with the most saved on mazes with no hedges removed as they are almost all corridors (2129 to 577 on a 25x25 maze and 238510 to 24064 on a 151x151 perfect maze in benchmarks/pathfinding.py)
+    The graph is built from the whole maze and is rebuilt if any tiles are changed
+    """
+    whole_maze = True
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.build()
+
+    def build(self):
+        """
+        Finds the junctions and dead ends of the maze and follows the corridors between them
+        """
+        self.changes = len(self.maze.changed_locs)
+        # Each corridor is stored as a list of the tiles from the node at one end to the node at the other end
+        self.corridors = []
+        # The corridors leaving each node, formatted as (corridor index, position of the node in the corridor, position of the other end)
+        self.edges = {}
+        # The corridor index and position in the corridor of every tile which isn't a node
+        self.corridor_locs = {}
+
+        # Finds the path neighbours of every path tile. Any tile which doesn't have exactly 2 is a junction or a dead end
+        path_locs = [(x, y) for y, row in enumerate(self.maze.locations[PATH], -1) for x in row]
+        neighbours = {loc: [neighbour for neighbour in self.maze.get_neighbour_locs(loc, diagonals=False) if self.maze.is_path(neighbour)] for loc in path_locs}
+        for loc in path_locs:
+            if len(neighbours[loc]) != 2:
+                self.edges[loc] = []
+        for loc in list(self.edges):
+            self.add_corridors(loc, neighbours)
+
+        # Loops without any junctions are never reached from a node, so a tile in each loop is made into a node
+        for loc in path_locs:
+            if loc not in self.edges and loc not in self.corridor_locs:
+                self.edges[loc] = []
+                self.add_corridors(loc, neighbours)
+
+    def add_corridors(self, node, neighbours):
+        """
+        Follows each corridor leaving a node that hasn't been followed yet until it reaches another node
+        """
+        for first_loc in neighbours[node]:
+            # Skips corridors which have already been followed from the other end
+            if first_loc in self.corridor_locs or (first_loc in self.edges and first_loc < node):
+                continue
+
+            # Keeps moving to the neighbour of the last tile which isn't the tile before it until a node is reached
+            corridor = [node, first_loc]
+            while corridor[-1] not in self.edges:
+                loc_1, loc_2 = neighbours[corridor[-1]]
+                corridor.append(loc_2 if loc_1 == corridor[-2] else loc_1)
+
+            index = len(self.corridors)
+            self.corridors.append(corridor)
+            for position in range(1, len(corridor) - 1):
+                self.corridor_locs[corridor[position]] = (index, position)
+            self.edges[node].append((index, 0, len(corridor) - 1))
+            self.edges[corridor[-1]].append((index, len(corridor) - 1, 0))
+
+    def get_moves(self, loc, destination_corridor):
+        """
+        Returns the moves along corridors that can be made from a location, formatted as (corridor index, starting position, end position)
+        A location in the middle of a corridor can move to either end, and any move along the destination's corridor can also stop at the destination
+        """
+        if loc in self.edges:
+            moves = self.edges[loc]
+        else:
+            index, position = self.corridor_locs[loc]
+            moves = [(index, position, 0), (index, position, len(self.corridors[index]) - 1)]
+
+        if destination_corridor != None:
+            moves = moves + [(index, start, destination_corridor[1]) for index, start, end in moves if index == destination_corridor[0]]
+        return moves
+
+    def get_path(self, starting_loc, destination):
+        """
+        Returns the shortest path from a starting location to a destination or None if there is no path
+        """
+        if len(self.maze.changed_locs) != self.changes:
+            self.build()
+        if starting_loc == destination:
+            return []
+        if not self.maze.is_path(destination):
+            return None
+        destination_corridor = self.corridor_locs.get(destination)
+
+        # A starting location that isn't a path starts from its path neighbours instead, which are one tile further away
+        # The parent of each location is stored along with the move that was made from the parent to reach it
+        if self.maze.is_path(starting_loc):
+            starts = [(starting_loc, 0, None)]
+        else:
+            starts = [(neighbour, 1, (starting_loc, None)) for neighbour in self.maze.get_neighbour_locs(starting_loc, diagonals=False) if self.maze.is_path(neighbour)]
+
+        # Each entry in the frontier is formatted as (cost + Manhattan distance, order added, cost, location)
+        frontier = []
+        costs = {}
+        parents = {starting_loc: None}
+        explored_locs = set()
+        for loc, cost, parent in starts:
+            costs[loc] = cost
+            parents[loc] = parent
+            heapq.heappush(frontier, (cost + abs(loc[0] - destination[0]) + abs(loc[1] - destination[1]), len(frontier), cost, loc))
+        added = len(frontier)
+
+        while len(frontier) != 0:
+            estimate, order, cost, loc = heapq.heappop(frontier)
+            if loc in explored_locs:
+                continue
+            explored_locs.add(loc)
+
+            if loc == destination:
+                return self.expand_path(loc, parents)
+
+            # Moves along each corridor from the location, keeping the move if it is the cheapest way found to reach the end of it
+            for index, start, end in self.get_moves(loc, destination_corridor):
+                next_loc = self.corridors[index][end]
+                next_cost = cost + abs(end - start)
+                if next_cost < costs.get(next_loc, next_cost + 1):
+                    costs[next_loc] = next_cost
+                    parents[next_loc] = (loc, (index, start, end))
+                    heapq.heappush(frontier, (next_cost + abs(next_loc[0] - destination[0]) + abs(next_loc[1] - destination[1]), added, next_cost, next_loc))
+                    added += 1
+
+        return None
+
+    def expand_path(self, loc, parents):
+        """
+        Backtracks from a location using the parent of each location and expands each move along a corridor into the tiles that it passes through
+        """
+        shortest_path = []
+        while parents[loc] != None:
+            parent, move = parents[loc]
+            if move == None:
+                shortest_path.append(loc)
+            else:
+                index, start, end = move
+                corridor = self.corridors[index]
+                tiles = corridor[start + 1:end + 1] if end > start else corridor[end:start][::-1]
+                shortest_path.extend(reversed(tiles))
+            loc = parent
+        shortest_path.reverse()
+        return shortest_path
+
+
+class HierarchicalPathfinder:
+    """
+    Hierarchical pathfinding (HPA*) which splits the maze into square clusters and connects them through entrances, which are the pairs of path tiles either side of each cluster border
+    The distances between the entrances of each cluster are worked out in advance so paths are found by searching between entrances and are then refined by searching within each cluster
+    Every pair of tiles on a border is an entrance as mazes only have a few, which keeps the paths the shortest possible
+    Only the clusters around tiles which have been changed are updated
+    """
+    whole_maze = True
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.changes = len(maze.changed_locs)
+        # The entrances in each cluster and the distances from each entrance to the other entrances it is connected to
+        self.entrances = {}
+        self.edges = {}
+
+        for cluster_x in range(math.ceil(maze.resolution[0] / CLUSTER_SIZE)):
+            for cluster_y in range(math.ceil(maze.resolution[1] / CLUSTER_SIZE)):
+                self.entrances[(cluster_x, cluster_y)] = set()
+        for cluster in self.entrances:
+            self.add_entrances(cluster, (cluster[0] + 1, cluster[1]))
+            self.add_entrances(cluster, (cluster[0], cluster[1] + 1))
+        for cluster in self.entrances:
+            self.connect_entrances(cluster)
+
+    def get_cluster(self, loc):
+        """
+        Returns the cluster that a location is in
+        """
+        return (loc[0] // CLUSTER_SIZE, loc[1] // CLUSTER_SIZE)
+
+    def get_neighbour_clusters(self, cluster):
+        """
+        Returns the clusters to the right, left, bottom and top of a cluster which are in the maze
+        """
+        return [(cluster[0] + offset[0], cluster[1] + offset[1]) for offset in NEIGHBOUR_OFFSETS if (cluster[0] + offset[0], cluster[1] + offset[1]) in self.entrances]
+
+    def add_entrances(self, cluster, other_cluster):
+        """
+        Adds an entrance to both clusters for each pair of path tiles either side of the border between them
+        """
+        if other_cluster not in self.entrances:
+            return
+
+        # Finds the tiles along the edge of the first cluster which face the second cluster
+        offset = (other_cluster[0] - cluster[0], other_cluster[1] - cluster[1])
+        top_left = (cluster[0] * CLUSTER_SIZE, cluster[1] * CLUSTER_SIZE)
+        bottom_right = (min(top_left[0] + CLUSTER_SIZE, self.maze.resolution[0]) - 1, min(top_left[1] + CLUSTER_SIZE, self.maze.resolution[1]) - 1)
+        if offset[0] != 0:
+            x = bottom_right[0] if offset[0] == 1 else top_left[0]
+            edge = [(x, y) for y in range(top_left[1], bottom_right[1] + 1)]
+        else:
+            y = bottom_right[1] if offset[1] == 1 else top_left[1]
+            edge = [(x, y) for x in range(top_left[0], bottom_right[0] + 1)]
+
+        for loc in edge:
+            other_loc = (loc[0] + offset[0], loc[1] + offset[1])
+            if self.maze.is_path(loc) and self.maze.is_path(other_loc):
+                self.entrances[cluster].add(loc)
+                self.entrances[other_cluster].add(other_loc)
+                self.edges.setdefault(loc, {})[other_loc] = 1
+                self.edges.setdefault(other_loc, {})[loc] = 1
+
+    def search_cluster(self, starting_loc, cluster):
+        """
+        Uses a breadth first search from a location to find the distance to every path tile in a cluster that can be reached without leaving it
+        Returns the distances along with the parent of each tile
+        """
+        distances = {starting_loc: 0}
+        parents = {starting_loc: None}
+        frontier = deque([starting_loc])
+        while len(frontier) != 0:
+            loc = frontier.popleft()
+            for neighbour in self.maze.get_neighbour_locs(loc, diagonals=False):
+                if neighbour not in distances and self.get_cluster(neighbour) == cluster and self.maze.is_path(neighbour):
+                    distances[neighbour] = distances[loc] + 1
+                    parents[neighbour] = loc
+                    frontier.append(neighbour)
+        return distances, parents
+
+    def connect_entrances(self, cluster):
+        """
+        Works out the distances between each pair of entrances in a cluster that are connected within the cluster
+        """
+        # Removes the old distances between the entrances in the cluster
+        for entrance in self.entrances[cluster]:
+            for other_entrance in list(self.edges[entrance]):
+                if self.get_cluster(other_entrance) == cluster:
+                    del self.edges[entrance][other_entrance]
+
+        for entrance in self.entrances[cluster]:
+            distances, parents = self.search_cluster(entrance, cluster)
+            for other_entrance in self.entrances[cluster]:
+                if other_entrance != entrance and other_entrance in distances:
+                    self.edges[entrance][other_entrance] = distances[other_entrance]
+
+    def update_cluster(self, cluster):
+        """
+        Finds the entrances of a cluster again along with the distances between them after its tiles have changed
+        The clusters around it are also updated as the entrances on their borders with it may have changed
+        """
+        neighbour_clusters = self.get_neighbour_clusters(cluster)
+
+        # Removes the cluster's entrances and the entrances they are paired with in the clusters around it
+        for entrance in self.entrances[cluster]:
+            for other_entrance in self.edges.pop(entrance):
+                if self.get_cluster(other_entrance) != cluster:
+                    del self.edges[other_entrance][entrance]
+        self.entrances[cluster] = set()
+        for neighbour_cluster in neighbour_clusters:
+            for entrance in list(self.entrances[neighbour_cluster]):
+                if all(self.get_cluster(other_entrance) == neighbour_cluster for other_entrance in self.edges[entrance]):
+                    self.entrances[neighbour_cluster].remove(entrance)
+                    for other_entrance in self.edges.pop(entrance):
+                        del self.edges[other_entrance][entrance]
+
+        # Adds the entrances on each border again and reconnects the entrances in all the clusters
+        for neighbour_cluster in neighbour_clusters:
+            self.add_entrances(cluster, neighbour_cluster)
+        for updated_cluster in [cluster] + neighbour_clusters:
+            self.connect_entrances(updated_cluster)
+
+    def get_edges(self, loc, destination, destination_distances):
+        """
+        Returns the locations that can be reached from a location in the search between entrances along with the distance to each of them
+        Locations which aren't entrances are searched from to find their distances to the entrances of their cluster
+        """
+        cluster = self.get_cluster(loc)
+        if loc in self.edges:
+            edges = list(self.edges[loc].items())
+        else:
+            distances, parents = self.search_cluster(loc, cluster)
+            edges = [(entrance, distances[entrance]) for entrance in self.entrances.get(cluster, ()) if entrance in distances]
+
+        # The destination can be reached from any location in its cluster which it can be reached from without leaving the cluster
+        if cluster == self.get_cluster(destination) and loc in destination_distances:
+            edges.append((destination, destination_distances[loc]))
+        return edges
+
+    def get_path(self, starting_loc, destination):
+        """
+        Returns the shortest path from a starting location to a destination or None if there is no path
+        """
+        # Updates the clusters containing any tiles which have changed
+        for loc in self.maze.changed_locs[self.changes:]:
+            if self.get_cluster(loc) in self.entrances:
+                self.update_cluster(self.get_cluster(loc))
+        self.changes = len(self.maze.changed_locs)
+
+        if starting_loc == destination:
+            return []
+        if not self.maze.is_path(destination):
+            return None
+        destination_distances, destination_parents = self.search_cluster(destination, self.get_cluster(destination))
+
+        # A starting location that isn't a path starts from its path neighbours instead, which are one tile further away
+        if self.maze.is_path(starting_loc):
+            starts = [(starting_loc, 0, None)]
+        else:
+            starts = [(neighbour, 1, starting_loc) for neighbour in self.maze.get_neighbour_locs(starting_loc, diagonals=False) if self.maze.is_path(neighbour)]
+
+        # Uses an A* search between the entrances, where each entry in the frontier is formatted as (cost + Manhattan distance, order added, cost, location)
+        frontier = []
+        costs = {}
+        parents = {starting_loc: None}
+        explored_locs = set()
+        for loc, cost, parent in starts:
+            costs[loc] = cost
+            parents[loc] = parent
+            heapq.heappush(frontier, (cost + abs(loc[0] - destination[0]) + abs(loc[1] - destination[1]), len(frontier), cost, loc))
+        added = len(frontier)
+
+        while len(frontier) != 0:
+            estimate, order, cost, loc = heapq.heappop(frontier)
+            if loc in explored_locs:
+                continue
+            explored_locs.add(loc)
+
+            if loc == destination:
+                return self.refine_path(loc, parents)
+
+            for next_loc, distance in self.get_edges(loc, destination, destination_distances):
+                if cost + distance < costs.get(next_loc, cost + distance + 1):
+                    costs[next_loc] = cost + distance
+                    parents[next_loc] = loc
+                    heapq.heappush(frontier, (cost + distance + abs(next_loc[0] - destination[0]) + abs(next_loc[1] - destination[1]), added, cost + distance, next_loc))
+                    added += 1
+
+        return None
+
+    def refine_path(self, loc, parents):
+        """
+        Turns the path between entrances into a path of tiles by searching within the cluster between each pair of locations that aren't next to each other
+        """
+        shortest_path = []
+        while parents[loc] != None:
+            parent = parents[loc]
+            if abs(loc[0] - parent[0]) + abs(loc[1] - parent[1]) == 1:
+                shortest_path.append(loc)
+            else:
+                distances, cluster_parents = self.search_cluster(parent, self.get_cluster(parent))
+                while loc != parent:
+                    shortest_path.append(loc)
+                    loc = cluster_parents[loc]
+            loc = parent
+        shortest_path.reverse()
+        return shortest_path
+
+
+class IncrementalSearch:
+    """
+    A Lifelong Planning A* (LPA*) search from a root location, which keeps the distance of every tile it has searched so it can be repaired instead of started again
+    Each tile has a distance and a look-ahead distance worked out from its neighbours. Tiles where these differ are inconsistent and are kept in the frontier until they are fixed
+    When the destination moves, the distances from the root are still correct so only the estimates change. Like D* Lite, the difference is added to every new key so the old keys don't need changing
+    When tiles are changed, only the tiles around them are made inconsistent and fixed
+    """
+    def __init__(self, maze, root):
+        self.maze = maze
+        self.root = root
+        self.destination = None
+        self.changes = len(maze.changed_locs)
+        # The distance and look-ahead distance of each tile from the root. Tiles that aren't in these are infinitely far away
+        self.distances = {}
+        self.look_aheads = {root: 0}
+        # How far the destination has moved in total, which is added to every key
+        self.key_modifier = 0
+        # The frontier is a heap of (key, order added, location) and the current key of each location in it, so outdated entries can be skipped
+        self.frontier = []
+        self.keys = {}
+        self.added = 0
+        self.add_to_frontier(root)
+
+    def get_key(self, loc):
+        """
+        Returns the key that a location is sorted by in the frontier, formatted as (estimated total distance, distance)
+        """
+        distance = min(self.distances.get(loc, math.inf), self.look_aheads.get(loc, math.inf))
+        return (distance + abs(loc[0] - self.destination[0]) + abs(loc[1] - self.destination[1]) + self.key_modifier, distance)
+
+    def add_to_frontier(self, loc):
+        """
+        Adds a location to the frontier with its current key, replacing its old entry if it has one
+        """
+        key = self.get_key(loc) if self.destination != None else (0, 0)
+        self.keys[loc] = key
+        heapq.heappush(self.frontier, (key, self.added, loc))
+        self.added += 1
+
+    def can_enter(self, loc):
+        """
+        Returns whether a path can go through a location. The root can always be left even if it isn't a path
+        """
+        return loc == self.root or self.maze.is_path(loc)
+
+    def update_loc(self, loc):
+        """
+        Works out the look-ahead distance of a location from its neighbours and adds it to the frontier if it is inconsistent
+        """
+        if loc != self.root:
+            look_ahead = math.inf
+            if self.maze.is_path(loc):
+                for neighbour in self.maze.get_neighbour_locs(loc, diagonals=False):
+                    if neighbour in self.distances and self.can_enter(neighbour):
+                        look_ahead = min(look_ahead, self.distances[neighbour] + 1)
+            if look_ahead == math.inf:
+                self.look_aheads.pop(loc, None)
+            else:
+                self.look_aheads[loc] = look_ahead
+
+        if self.distances.get(loc, math.inf) != self.look_aheads.get(loc, math.inf):
+            self.add_to_frontier(loc)
+        else:
+            self.keys.pop(loc, None)
+
+    def set_destination(self, destination):
+        """
+        Moves the destination, increasing the key modifier by how far it moved so that the keys in the frontier are still never too large
+        """
+        if self.destination != None:
+            self.key_modifier += abs(destination[0] - self.destination[0]) + abs(destination[1] - self.destination[1])
+        self.destination = destination
+
+    def update_changed_tiles(self):
+        """
+        Makes the tiles which have changed since the last search, and their neighbours, consistent again
+        """
+        for loc in self.maze.changed_locs[self.changes:]:
+            for changed_loc in [loc] + self.maze.get_neighbour_locs(loc, diagonals=False):
+                self.update_loc(changed_loc)
+        self.changes = len(self.maze.changed_locs)
+
+    def search(self):
+        """
+        Fixes inconsistent locations in order of their keys until the destination is consistent and nothing in the frontier could give it a shorter path
+        """
+        destination = self.destination
+        while len(self.frontier) != 0:
+            key, order, loc = self.frontier[0]
+            if self.keys.get(loc) != key:
+                heapq.heappop(self.frontier)
+                continue
+            if key >= self.get_key(destination) and self.distances.get(destination, math.inf) == self.look_aheads.get(destination, math.inf):
+                break
+
+            # Puts the location back with its new key if the destination has moved since it was added
+            heapq.heappop(self.frontier)
+            new_key = self.get_key(loc)
+            if key < new_key:
+                self.add_to_frontier(loc)
+                continue
+            del self.keys[loc]
+
+            # A location which is further than it could be is given its look-ahead distance, otherwise it is reset so it can be worked out again
+            neighbours = [neighbour for neighbour in self.maze.get_neighbour_locs(loc, diagonals=False) if self.maze.is_path(neighbour)]
+            if self.distances.get(loc, math.inf) > self.look_aheads.get(loc, math.inf):
+                self.distances[loc] = self.look_aheads[loc]
+            else:
+                self.distances.pop(loc, None)
+                neighbours.append(loc)
+            for neighbour in neighbours:
+                self.update_loc(neighbour)
+
+    def get_path(self, starting_loc, destination):
+        """
+        Returns the shortest path from a starting location to a destination if the shortest path from the root to the destination goes through it, otherwise None
+        """
+        self.set_destination(destination)
+        self.update_changed_tiles()
+        if destination != self.root and not self.maze.is_path(destination):
+            return None
+        self.search()
+        if destination not in self.distances:
+            return None
+
+        # Steps back from the destination to a neighbour one tile closer to the root until the starting location or the root is reached
+        shortest_path = []
+        loc = destination
+        while loc != starting_loc:
+            if loc == self.root:
+                return None
+            shortest_path.append(loc)
+            distance = self.distances[loc] - 1
+            for offset in NEIGHBOUR_OFFSETS:
+                neighbour = (loc[0] + offset[0], loc[1] + offset[1])
+                if self.distances.get(neighbour) == distance and self.can_enter(neighbour):
+                    loc = neighbour
+                    break
+        shortest_path.reverse()
+        return shortest_path
+
+
+class IncrementalPathfinder:
+    """
+    Keeps incremental searches which are reused while enemies follow the paths they found, so each new path only repairs an earlier search
+    While an enemy walks along its path, the shortest path from the root of the search to the player usually still goes through the enemy as the player moves around ahead of it
+    A new search is started from the enemy if it doesn't
+    """
+    whole_maze = False
+
+    def __init__(self, maze):
+        self.maze = maze
+        # The searches in least recently used order, each with the locations which are on its paths, and the search that each location was last on the path of
+        self.searches = OrderedDict()
+        self.searches_by_loc = {}
+
+    def add_search(self, root):
+        """
+        Starts a new search from a root, removing the least recently used search if there are too many
+        """
+        search = IncrementalSearch(self.maze, root)
+        self.searches[search] = set()
+        if len(self.searches) > MAX_INCREMENTAL_SEARCHES:
+            self.remove_search(next(iter(self.searches)))
+        return search
+
+    def remove_search(self, search):
+        """
+        Removes a search along with the locations on its paths
+        """
+        for loc in self.searches.pop(search):
+            if self.searches_by_loc.get(loc) is search:
+                del self.searches_by_loc[loc]
+
+    def get_path(self, starting_loc, destination):
+        """
+        Returns the shortest path from a starting location to a destination or None if there is no path
+        """
+        # Reuses the search whose path the starting location was last on unless it has grown too large
+        search = self.searches_by_loc.get(starting_loc)
+        if search == None or search not in self.searches or len(search.distances) > MAX_INCREMENTAL_SEARCH_TILES:
+            search = self.add_search(starting_loc)
+
+        # Starts again from the starting location if the new path from the root doesn't go through it
+        path = search.get_path(starting_loc, destination)
+        if path == None and starting_loc != search.root:
+            search = self.add_search(starting_loc)
+            path = search.get_path(starting_loc, destination)
+
+        self.searches.move_to_end(search)
+        if path != None:
+            for loc in [starting_loc] + path:
+                self.searches_by_loc[loc] = search
+                self.searches[search].add(loc)
+        return path
+
+
+class LineOfSight:
+    """
+    Checks whether there is a straight line of path tiles between two locations by walking along the line over the tile grid
+    The line steps one tile across or down at a time, so when it is clear it is also one of the shortest paths and no search is needed
+    The result for each pair of locations is kept until the maze changes
+    """
+    def __init__(self, maze):
+        self.maze = maze
+        self.changes = len(maze.changed_locs)
+        self.lines = {}
+
+    def get_line(self, starting_loc, destination):
+        """
+        Returns the locations along the line from a starting location to a destination, not including the starting location, or None if any of them aren't paths
+        The line moves along whichever axis it is furthest behind on, like a digital differential analyser (DDA) which can't move diagonally
+        """
+        dx, dy = destination[0] - starting_loc[0], destination[1] - starting_loc[1]
+        step_x, step_y = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+        dx, dy = abs(dx), abs(dy)
+        x, y = starting_loc
+        moved_x = moved_y = 0
+        line = []
+        while moved_x < dx or moved_y < dy:
+            # Compares how far through the line each axis would be at the middle of its next tile
+            if (1 + 2 * moved_x) * dy < (1 + 2 * moved_y) * dx:
+                x += step_x
+                moved_x += 1
+            else:
+                y += step_y
+                moved_y += 1
+            if not self.maze.is_path((x, y)):
+                return None
+            line.append((x, y))
+        return tuple(line)
+
+    def get_path(self, starting_loc, destination):
+        """
+        Returns the path along the line from a starting location to a destination if the destination can be seen, otherwise None
+        """
+        if abs(destination[0] - starting_loc[0]) + abs(destination[1] - starting_loc[1]) > MAX_LINE_OF_SIGHT:
+            return None
+
+        # Clears the lines if the maze has changed or too many have been kept
+        if len(self.maze.changed_locs) != self.changes or len(self.lines) > MAX_LINES_OF_SIGHT:
+            self.changes = len(self.maze.changed_locs)
+            self.lines = {}
+
+        if (starting_loc, destination) not in self.lines:
+            self.lines[(starting_loc, destination)] = self.get_line(starting_loc, destination)
+        line = self.lines[(starting_loc, destination)]
+        return list(line) if line != None else None
+
+
+# These are the ways that enemies can find their paths to the player
+PATHFINDERS = {'a_star': AStar, 'flow_field': FlowField, 'junction_graph': JunctionGraph, 'hierarchical': HierarchicalPathfinder, 'incremental': IncrementalPathfinder}
+
+
+class PathScheduler:
+    """
+    A queue of enemies waiting for new paths, which are given paths each frame until the time budget for the frame has been spent
+    Enemies keep following their last path until they are given a new one. Enemies on the screen are served first, followed by the enemies closest to the player
+    """
+    def __init__(self, game, budget=PATH_BUDGET):
+        self.game = game
+        self.budget = budget
+        # The enemies waiting for paths. A dictionary is used as an ordered set so each enemy is only queued once
+        self.requests = {}
+
+    def request_path(self, enemy):
+        """
+        Adds an enemy to the queue
+        """
+        self.requests[enemy] = True
+
+    def cancel(self, enemy):
+        """
+        Removes an enemy from the queue if it is in it
+        """
+        self.requests.pop(enemy, None)
+
+    def get_priority(self, enemy, screen_rect):
+        """
+        Returns a key which sorts enemies on the screen before enemies off the screen and closer enemies before enemies further away
+        """
+        center, player_center = enemy.get_center(), self.game.player.get_center()
+        return (not screen_rect.colliderect(enemy.get_rect()), (center[0] - player_center[0]) ** 2 + (center[1] - player_center[1]) ** 2)
+
+    def update(self):
+        """
+        Gives new paths to the enemies with the highest priority until the budget for this frame has been spent
+        At least one enemy is always given a path so the queue keeps moving however long each path takes
+        """
+        start_time = time.perf_counter()
+        screen_rect = pygame.Rect(self.game.camera_displacement, self.game.display.get_size())
+        for enemy in sorted(self.requests, key=lambda enemy: self.get_priority(enemy, screen_rect)):
+            del self.requests[enemy]
+            enemy.calculate_path()
+            if time.perf_counter() - start_time >= self.budget:
+                break
+
+    def close(self):
+        """
+        Releases anything the scheduler uses once the game has ended. Nothing needs releasing when paths are found in the game's process
+        """
+        pass
+
+
+class MazeSnapshot:
+    """
+    A compact copy of the tile grid of a maze which can be sent to a worker process, with the methods of the maze that the flow field needs
+    """
+    def __init__(self, maze):
+        self.resolution = maze.resolution
+        self.width = maze.width
+        self.types = bytearray(maze.types)
+
+    def get_code(self, loc):
+        """
+        Gets the code of the tile at a location or VOID if the location is outside the grid
+        """
+        if -PADDING <= loc[0] < self.resolution[0] + PADDING and -PADDING <= loc[1] < self.resolution[1] + PADDING:
+            return self.types[(loc[1] + PADDING) * self.width + loc[0] + PADDING]
+        return VOID
+
+    def is_path(self, loc):
+        """
+        Returns whether the tile at a location is a path
+        """
+        return self.get_code(loc) == PATH
+
+    def get_neighbour_locs(self, loc, diagonals=False):
+        """
+        Gets the locations of the neighbouring tiles to the right, left, bottom and top of a location
+        """
+        return [(loc[0] + offset[0], loc[1] + offset[1]) for offset in NEIGHBOUR_OFFSETS if self.get_code((loc[0] + offset[0], loc[1] + offset[1])) != VOID]
+
+
+# The flow field used by a worker process to find paths over its copy of the maze and how many of the maze's changes have been made to the copy
+worker_pathfinder = None
+worker_changes = 0
+
+def start_path_worker(snapshot):
+    """
+    Sets up a worker process with its copy of the maze. This is only called once when each worker process starts
+    """
+    global worker_pathfinder
+    worker_pathfinder = FlowField(snapshot)
+
+def find_paths(changes, starting_locs, destination):
+    """
+    Finds the paths from each starting location to a destination in a worker process
+    The changes are every (location, tile code) change made to the maze since the copy was made, so any that haven't been made to the copy yet are made first
+    """
+    global worker_changes
+    if len(changes) != worker_changes:
+        for loc, code in changes[worker_changes:]:
+            worker_pathfinder.maze.types[(loc[1] + PADDING) * worker_pathfinder.maze.width + loc[0] + PADDING] = code
+        worker_changes = len(changes)
+        worker_pathfinder.destination = None
+    return [worker_pathfinder.get_path(starting_loc, destination) for starting_loc in starting_locs]
+
+
+class ProcessPathScheduler(PathScheduler):
+    """
+    A path scheduler which sends batches of enemies to a pool of worker processes to find their paths, so pathfinding doesn't slow down the game's process
+    Each worker is given a copy of the maze once when it starts and only the changes to the maze are sent with each batch
+    Enemies keep following their last path while their batch is being worked on. Batches that take too long or fail are given up on and their enemies are queued to be given paths in the game's process instead
+    If the pool breaks, every path is found in the game's process from then on
+    """
+    def __init__(self, game, workers, budget=PATH_BUDGET):
+        super().__init__(game, budget)
+        self.workers = workers
+        self.pool = None
+        self.broken = False
+        # The enemies waiting to be sent to a worker, the batches being worked on and the batch that each enemy is in
+        # Late batches stay in the batches until they finish as they still keep a worker busy
+        self.worker_requests = {}
+        self.batches = []
+        self.in_flight = {}
+
+    def request_path(self, enemy):
+        """
+        Adds an enemy to the queue for the workers unless its path is already being found, or to the game's queue if the pool has broken
+        """
+        if self.broken:
+            super().request_path(enemy)
+        elif enemy not in self.in_flight:
+            self.worker_requests[enemy] = True
+
+    def cancel(self, enemy):
+        """
+        Removes an enemy from the queues and ignores the path being found for it
+        """
+        super().cancel(enemy)
+        self.worker_requests.pop(enemy, None)
+        self.in_flight.pop(enemy, None)
+
+    def start_pool(self):
+        """
+        Starts the worker processes with a copy of the maze
+        New processes are spawned instead of forked so they don't copy the game's window and threads
+        """
+        maze = self.game.maze
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=start_path_worker, initargs=(MazeSnapshot(maze),))
+        self.changes = len(maze.changed_locs)
+
+    def stop_pool(self):
+        """
+        Shuts down a pool which has broken and queues every enemy waiting for the workers to be given a path in the game's process instead
+        """
+        self.pool.shutdown(cancel_futures=True)
+        self.pool = None
+        self.broken = True
+        for enemy in list(self.worker_requests) + list(self.in_flight):
+            super().request_path(enemy)
+        self.worker_requests = {}
+        self.batches = []
+        self.in_flight = {}
+
+    def apply_path(self, enemy, starting_loc, path):
+        """
+        Gives an enemy the path found for it by a worker
+        The enemy may have moved on while the path was being found, so the path is followed from the enemy's current tile if it is on it, otherwise a new path is asked for
+        """
+        if path == None:
+            enemy.kill()
+            return
+        loc = self.game.maze.get_loc(enemy.get_center())
+        if loc == starting_loc:
+            enemy.path = path
+        elif loc in path:
+            enemy.path = path[path.index(loc) + 1:]
+        else:
+            self.request_path(enemy)
+
+    def update(self):
+        """
+        Gives enemies the paths from finished batches, gives up on late or failed batches and sends the enemies with the highest priority to the workers in a new batch
+        Then any enemies from late or failed batches are given paths in the game's process within the budget for this frame
+        """
+        if not self.broken:
+            self.update_batches()
+        super().update()
+
+    def update_batches(self):
+        """
+        Collects the finished batches and sends a new batch to the workers, stopping the pool if it has broken
+        """
+        if self.pool == None:
+            self.start_pool()
+
+        for batch in self.batches.copy():
+            if batch['future'].done():
+                self.batches.remove(batch)
+                # A batch which failed or was cancelled has no paths, so its enemies are given paths in the game's process
+                try:
+                    paths = batch['future'].result()
+                except BrokenExecutor:
+                    self.stop_pool()
+                    return
+                except Exception:
+                    paths = [False] * len(batch['enemies'])
+                for enemy, starting_loc, path in zip(batch['enemies'], batch['starting_locs'], paths):
+                    if self.in_flight.get(enemy) is batch:
+                        del self.in_flight[enemy]
+                        if path is False:
+                            super().request_path(enemy)
+                        else:
+                            self.apply_path(enemy, starting_loc, path)
+            elif not batch['late'] and time.perf_counter() - batch['time'] > PATH_WORKER_TIMEOUT:
+                # The batch is late so its result will be ignored when it arrives, but it is kept until then as its worker is still busy
+                batch['late'] = True
+                batch['future'].cancel()
+                for enemy in batch['enemies']:
+                    if self.in_flight.get(enemy) is batch:
+                        del self.in_flight[enemy]
+                        super().request_path(enemy)
+
+        # Gives the waiting enemies paths in the game's process if every worker is stuck on a late batch
+        if len(self.batches) >= self.workers and all(batch['late'] for batch in self.batches):
+            for enemy in self.worker_requests:
+                super().request_path(enemy)
+            self.worker_requests = {}
+
+        # Sends a batch to the workers if one isn't busy
+        if len(self.worker_requests) != 0 and len(self.batches) < self.workers:
+            screen_rect = pygame.Rect(self.game.camera_displacement, self.game.display.get_size())
+            enemies = sorted(self.worker_requests, key=lambda enemy: self.get_priority(enemy, screen_rect))[:PATH_BATCH_SIZE]
+            changes = [(loc, self.game.maze.get_code(loc)) for loc in self.game.maze.changed_locs[self.changes:]]
+            batch = {'enemies': enemies, 'starting_locs': [self.game.maze.get_loc(enemy.get_center()) for enemy in enemies], 'time': time.perf_counter(), 'late': False}
+            try:
+                batch['future'] = self.pool.submit(find_paths, changes, batch['starting_locs'], self.game.player.get_feet_loc())
+            except BrokenExecutor:
+                self.stop_pool()
+                return
+            self.batches.append(batch)
+            for enemy in enemies:
+                del self.worker_requests[enemy]
+                self.in_flight[enemy] = batch
+
+    def close(self):
+        """
+        Shuts down the worker processes, cancelling the batches that haven't been started
+        """
+        if self.pool != None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
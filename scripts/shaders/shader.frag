@@ -8,15 +8,48 @@ uniform sampler2D light_map;    // The light map texture
 uniform float time;
 uniform vec3 daylight;   // Time of day (0.0 to 1.0)
 
+uniform int tilemap;    // Whether the maze is drawn from the tilemap underneath the screen texture
+uniform sampler2D tilemap_texture;  // The index of the tile variant at each location, stored in the red (low byte) and green (high byte) channels
+uniform sampler2D tile_atlas;   // The image of every tile variant
+uniform vec2 camera;    // The position of the top left of the screen relative to the top left of the tilemap
+uniform vec2 display_size;  // The size of the screen texture in pixels
+uniform float tile_size;
+uniform int atlas_columns;  // How many tile variants are in each row of the atlas
+
+const vec3 ground_color = vec3(35.0, 72.0, 39.0) / 255.0;
+
 in vec2 uv;
 out vec4 f_color;
 
+vec3 get_tile_color()
+{
+    // Finds the pixel of the maze at this point on the screen and the tile it is in
+    vec2 pixel = floor(camera + uv * display_size);
+    ivec2 tile = ivec2(floor(pixel / tile_size));
+    if (any(lessThan(tile, ivec2(0))) || any(greaterThanEqual(tile, textureSize(tilemap_texture, 0)))) {
+        return ground_color;
+    }
+
+    // Reads the variant of the tile and finds the matching pixel in the atlas
+    vec2 variant_bytes = texelFetch(tilemap_texture, tile, 0).rg * 255.0 + 0.5;
+    int variant = int(variant_bytes.r) + int(variant_bytes.g) * 256;
+    ivec2 atlas_pixel = ivec2(variant % atlas_columns, variant / atlas_columns) * int(tile_size) + ivec2(pixel - vec2(tile) * tile_size);
+    vec4 tile_color = texelFetch(tile_atlas, atlas_pixel, 0);
+
+    return mix(ground_color, tile_color.rgb, tile_color.a);
+}
+
 void main()
 {
     // Gets the initial color from the texture
     vec4 screen_color = texture(screen_texture, uv);
     
     if (screen == 0) {
+        // Draws the screen texture over the maze if the maze is being drawn from the tilemap
+        if (tilemap == 1) {
+            screen_color = vec4(mix(get_tile_color(), screen_color.rgb, screen_color.a), 1.0);
+        }
+
         // Gets the color as a result of multiplying the initial color by the daytime
         vec3 daylight_color = screen_color.rgb * daylight;  
 
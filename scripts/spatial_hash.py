@@ -0,0 +1,59 @@
+import math
+
+class SpatialHash:
+    """
+    A uniform grid of buckets, one for each maze tile, which holds the entities whose rects overlap each tile
+    Entities are moved between buckets as they move, so the entities near a rect can be found without checking every entity
+    Dictionaries are used as ordered sets so entities are always found in the order they were added
+    """
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.buckets = {}
+        # The cells that each entity is in, stored as the range of cells covered by its rect
+        self.entity_cells = {}
+
+    def get_cell_range(self, rect):
+        """
+        Returns the top left and bottom right cells that a rect overlaps
+        """
+        return (math.floor(rect.left / self.cell_size), math.floor(rect.top / self.cell_size), math.floor((rect.right - 1) / self.cell_size), math.floor((rect.bottom - 1) / self.cell_size))
+
+    def get_cells(self, cell_range):
+        """
+        Returns every cell within a range of cells
+        """
+        return [(x, y) for x in range(cell_range[0], cell_range[2] + 1) for y in range(cell_range[1], cell_range[3] + 1)]
+
+    def update(self, entity):
+        """
+        Adds an entity to the buckets of the cells its rect overlaps, moving it out of the buckets it was in if it has moved to different cells
+        """
+        cell_range = self.get_cell_range(entity.get_rect())
+        if self.entity_cells.get(entity) == cell_range:
+            return
+        self.remove(entity)
+        self.entity_cells[entity] = cell_range
+        for cell in self.get_cells(cell_range):
+            self.buckets.setdefault(cell, {})[entity] = True
+
+    def remove(self, entity):
+        """
+        Removes an entity from all of its buckets if it is in the grid
+        """
+        if entity not in self.entity_cells:
+            return
+        for cell in self.get_cells(self.entity_cells.pop(entity)):
+            bucket = self.buckets[cell]
+            del bucket[entity]
+            if len(bucket) == 0:
+                del self.buckets[cell]
+
+    def query(self, rect):
+        """
+        Returns the entities in the buckets of the cells that a rect overlaps. These may not be colliding with the rect so they still need checking
+        """
+        entities = {}
+        for cell in self.get_cells(self.get_cell_range(rect)):
+            if cell in self.buckets:
+                entities.update(self.buckets[cell])
+        return list(entities)
@@ -63,6 +63,7 @@ class MGLWindow:
         self.window = pygame.display.set_mode(resolution, pygame.OPENGL | pygame.DOUBLEBUF)
         self.ctx = moderngl.create_context()
         self.uniforms = {}
+        self.textures = {}
         self.memory_locations = {}
 
         # Vertex Buffer Object mapping each vertice on the pygame surface to the one on the opengl texture. Each line is (mgl x, mgl y, py x, py y)
@@ -99,19 +100,57 @@ class MGLWindow:
             if isinstance(uniforms[uniform], pygame.Surface):
                 # Converts the uniform to a moderngl Texture
                 self.uniforms[uniform] = self.surf_to_texture(uniforms[uniform])
-                # Checks whether it has an assigned memory location and if not, assigns it to the next available location
-                if uniform not in self.memory_locations:
-                    if len(self.memory_locations) == 0:
-                       self.memory_locations[uniform] = 0
-                    else: 
-                        self.memory_locations[uniform] = max(self.memory_locations.values()) + 1
-                    # Tells the program which memory location the uniform is at
-                    self.program[uniform] = self.memory_locations[uniform]
                 # Tells the uniform which memory location to go to
-                self.uniforms[uniform].use(self.memory_locations[uniform])
+                self.uniforms[uniform].use(self.get_memory_location(uniform))
             else:
                 self.program[uniform].value = uniforms[uniform]
 
+    def get_memory_location(self, uniform):
+        """
+        Returns the memory location of a texture uniform, assigning it to the next available location if it doesn't have one
+        """
+        if uniform not in self.memory_locations:
+            if len(self.memory_locations) == 0:
+               self.memory_locations[uniform] = 0
+            else: 
+                self.memory_locations[uniform] = max(self.memory_locations.values()) + 1
+            # Tells the program which memory location the uniform is at
+            self.program[uniform] = self.memory_locations[uniform]
+        return self.memory_locations[uniform]
+
+    def set_texture(self, uniform, texture):
+        """
+        Keeps a texture bound to a uniform until it is removed so it doesn't need to be uploaded every frame
+        """
+        self.remove_texture(uniform)
+        self.textures[uniform] = texture
+        texture.use(self.get_memory_location(uniform))
+
+    def remove_texture(self, uniform):
+        """
+        Releases a texture which was kept with set_texture
+        """
+        if uniform in self.textures:
+            self.textures.pop(uniform).release()
+
+    def load_tilemap(self, tilemap, tile_size):
+        """
+        Uploads a maze tilemap (from Maze.get_tilemap) so the ground can be drawn by the shader instead of being blitted every frame
+        """
+        # Creates a texture where the red and green channels hold the low and high bytes of the variant index of each tile
+        tilemap_texture = self.ctx.texture(tilemap['size'], 2, tilemap['data'])
+        tilemap_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.set_texture('tilemap_texture', tilemap_texture)
+        self.set_texture('tile_atlas', self.surf_to_texture(tilemap['atlas']))
+        self.pass_uniforms({'tile_size': float(tile_size), 'atlas_columns': tilemap['atlas_columns']})
+
+    def release_tilemap(self):
+        """
+        Releases the textures used to draw a maze in the shader
+        """
+        self.remove_texture('tilemap_texture')
+        self.remove_texture('tile_atlas')
+
     def release(self, uniforms={}):
         """
         Releases all the uniforms to free the space in memory
@@ -141,6 +180,9 @@ class MGLWindow:
         """
         # Passes the uniforms to te program and then runs the shaders to render the frame before releasing the uniforms and updating the screen
         self.pass_uniforms(uniforms)
+        # Binds the textures which are kept between frames in case their memory locations were used by another texture
+        for uniform in self.textures:
+            self.textures[uniform].use(self.memory_locations[uniform])
         self.vao.render(mode=moderngl.TRIANGLE_STRIP)
         self.release(uniforms)
         pygame.display.flip()
@@ -0,0 +1,68 @@
+"""
+Fixtures shared by the tests
+"""
+import random
+
+import pytest
+
+from scripts.maze import Maze, fill_hedges, carve_maze, remove_hedges, add_border
+from scripts.pathfinding import find_path
+
+def generate_test_maze(resolution, removed_tiles, seed):
+    """
+    Generates a maze without any images, with its collision rects and path components worked out, so it can be used outside of the game
+    """
+    maze = Maze(None, 32, resolution)
+    rng = random.Random(seed)
+    fill_hedges(maze)
+    carve_maze(maze, rng, (1, 1))
+    remove_hedges(maze, removed_tiles, rng, (0, 0), (resolution[0] - 1, resolution[1] - 1))
+    add_border(maze)
+    maze.index_locations()
+    maze.build_collision_rects()
+    maze.label_components()
+    return maze
+
+@pytest.fixture
+def create_maze():
+    """
+    Gives the tests a function which generates a maze from its resolution, the number of hedges removed from it and a seed
+    """
+    return generate_test_maze
+
+def change_random_tile(maze, rng):
+    """
+    Turns a random path tile of a maze into a hedge or a random hedge tile into a path, cutting off and joining up parts of the maze
+    Hedges are added twice as often as paths are so the maze is split into several pieces
+    """
+    type = rng.choice(("hedge", "hedge", "path"))
+    loc = maze.get_random_loc("path" if type == "hedge" else "hedge", ((0, 0), (maze.resolution[0] - 1, maze.resolution[1] - 1)), rng=rng)
+    maze.change_tile(loc, type)
+
+@pytest.fixture
+def change_tile():
+    """
+    Gives the tests a function which changes a random tile of a maze using a random number generator
+    """
+    return change_random_tile
+
+def assert_same_path_length(maze, path, starting_loc, destination):
+    """
+    Checks that a path walks along the paths of a maze from a starting location to a destination and is as short as the path found by find_path
+    """
+    shortest_path = find_path(maze, starting_loc, destination)
+    if shortest_path == None:
+        assert path == None
+        return
+    assert path != None and len(path) == len(shortest_path)
+    for loc, next_loc in zip([starting_loc] + path, path):
+        assert abs(loc[0] - next_loc[0]) + abs(loc[1] - next_loc[1]) == 1
+        assert maze.is_path(next_loc)
+    assert path[-1:] == shortest_path[-1:]
+
+@pytest.fixture
+def check_path():
+    """
+    Gives the tests a function which checks a path found by one of the pathfinders against find_path
+    """
+    return assert_same_path_length
@@ -0,0 +1,58 @@
+"""
+Checks that the path components kept up to date as tiles are changed match the components found by flood filling the maze from scratch
+Run from the root of the project with: python -m pytest tests
+"""
+import random
+
+from scripts.maze import PATH
+from scripts.pathfinding import find_path
+
+# This is how many tiles are changed in each maze, with the components being checked after each change
+CHANGES = 300
+# This is how many pairs of locations are checked for whether they can reach each other after each change
+REACHABLE_CHECKS = 5
+
+def flood_fill(maze):
+    """
+    Returns the sets of indexes of the path tiles in each connected component of the maze, found by flood filling it from scratch
+    """
+    offsets = (1, -1, maze.width, -maze.width)
+    components = []
+    visited = set()
+    for index, code in enumerate(maze.types):
+        if code != PATH or index in visited:
+            continue
+        component = {index}
+        stack = [index]
+        while len(stack) != 0:
+            index = stack.pop()
+            for offset in offsets:
+                neighbour = index + offset
+                if maze.types[neighbour] == PATH and neighbour not in component:
+                    component.add(neighbour)
+                    stack.append(neighbour)
+        visited |= component
+        components.append(component)
+    return components
+
+def test_components_match_flood_fill(create_maze, change_tile):
+    maze = create_maze((31, 29), 10, 0)
+    rng = random.Random(3)
+    for change in range(CHANGES):
+        change_tile(maze, rng)
+
+        # Every path tile should have the label of its component, and only path tiles should have a label
+        labels = {}
+        for index, code in enumerate(maze.types):
+            if code == PATH:
+                labels.setdefault(maze.components[index], set()).add(index)
+            else:
+                assert maze.components[index] == 0
+        assert 0 not in labels
+        assert sorted(map(sorted, labels.values())) == sorted(map(sorted, flood_fill(maze)))
+        assert maze.component_sizes == {label: len(indexes) for label, indexes in labels.items()}
+
+        for check in range(REACHABLE_CHECKS):
+            starting_loc = (rng.randrange(-1, maze.resolution[0] + 1), rng.randrange(-1, maze.resolution[1] + 1))
+            destination = maze.get_random_loc("path", rng=rng)
+            assert maze.is_reachable(starting_loc, destination) == (starting_loc == destination or find_path(maze, starting_loc, destination) != None)
@@ -0,0 +1,62 @@
+"""
+Checks that enemies off of the screen, which are only updated every OFF_SCREEN_UPDATE_TIME seconds, still follow their paths to their destination
+Run from the root of the project with: python -m pytest tests
+"""
+import random
+import types
+
+import pygame
+
+from scripts.entities import Enemy, get_due_enemies
+from scripts.pathfinding import LineOfSight, find_path
+from scripts.spatial_hash import SpatialHash
+
+# This is how many frames the enemy has to reach its destination, which is enough to walk its path about four times over
+FRAMES = 1500
+# This is how many tiles long the enemy's path is
+PATH_LENGTH = 20
+# This is the enemy's speed, which doesn't divide the tile size so its steps don't land exactly on the centers of the tiles
+SPEED = 1.7
+# This is a screen border far away from the maze so the enemy is always off of the screen
+SCREEN_BORDER = ((-100, -100), (-90, -90))
+
+def create_game(maze):
+    """
+    Returns just enough of a game for an enemy to follow its path
+    """
+    game = types.SimpleNamespace(maze=maze, enemies=[])
+    game.animations = {'red_slime': {'idle': None, 'running': None, 'death': None}}
+    game.enemy_hash = SpatialHash(maze.tile_size)
+    game.line_of_sight = LineOfSight(maze)
+    game.path_scheduler = types.SimpleNamespace(request_path=lambda enemy: None, cancel=lambda enemy: None)
+    return game
+
+def test_off_screen_enemy_reaches_destination(create_maze):
+    game = create_game(create_maze((31, 31), 0, 0))
+    # Finds two tiles with a long path between them so the enemy has to turn corners to follow it
+    rng = random.Random(0)
+    path = []
+    while len(path) < PATH_LENGTH:
+        starting_loc = game.maze.get_random_loc("path", rng=rng)
+        path = find_path(game.maze, starting_loc, game.maze.get_random_loc("path", rng=rng)) or []
+    path = path[:PATH_LENGTH]
+    destination = path[-1]
+    # The player stands on the destination, but their rect is kept away from the enemy so it never attacks them
+    tile_size = game.maze.tile_size
+    game.player = types.SimpleNamespace(pos=[destination[0] * tile_size + 9, destination[1] * tile_size + 6], get_feet_loc=lambda: destination, get_rect=lambda: pygame.Rect(-1000, -1000, 1, 1))
+
+    enemy = Enemy(game, starting_loc, (16, 16), SPEED, 30, 'red')
+    enemy.path = list(path)
+    game.enemies.append(enemy)
+    updates = 0
+    for frame in range(FRAMES):
+        for due_enemy in get_due_enemies(game.enemies, game.maze, SCREEN_BORDER, 1 / 60):
+            due_enemy.update()
+            updates += 1
+        if game.maze.get_loc(enemy.get_center()) == destination and len(enemy.path) == 0:
+            break
+
+    assert not enemy.on_screen
+    # The enemy should only have been updated about once every four frames
+    assert updates <= frame // 3
+    assert game.maze.get_loc(enemy.get_center()) == destination
@@ -0,0 +1,24 @@
+"""
+Checks that the hierarchical pathfinder still finds the shortest paths after its clusters are updated for tiles which have been changed
+Run from the root of the project with: python -m pytest tests
+"""
+import random
+
+from scripts.pathfinding import HierarchicalPathfinder
+
+# This is how many tiles are changed in the maze, with paths being found after each change
+CHANGES = 200
+# This is how many paths are found after each change
+PATHS = 5
+
+def test_paths_match_find_path_after_changes(create_maze, change_tile, check_path):
+    # The maze is several clusters wide so paths cross between clusters which have been updated and clusters which haven't
+    maze = create_maze((41, 37), 20, 0)
+    pathfinder = HierarchicalPathfinder(maze)
+    rng = random.Random(5)
+    for change in range(CHANGES):
+        change_tile(maze, rng)
+        for i in range(PATHS):
+            starting_loc = maze.get_random_loc("path", rng=rng)
+            destination = maze.get_random_loc("path", rng=rng)
+            check_path(maze, pathfinder.get_path(starting_loc, destination), starting_loc, destination)
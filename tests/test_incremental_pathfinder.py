@@ -0,0 +1,39 @@
+"""
+Checks that the incremental pathfinder still finds the shortest paths after its searches are repaired for tiles which have been changed
+Run from the root of the project with: python -m pytest tests
+"""
+import random
+
+from scripts.pathfinding import IncrementalPathfinder
+
+# This is how many tiles are changed in the maze, with paths being found after each change
+CHANGES = 300
+# This is how many enemies follow their paths to the player, which is how many paths are found after each change
+ENEMY_COUNT = 5
+# This is the chance after each change that the player moves to a random tile instead of a tile next to them
+TELEPORT_CHANCE = 0.1
+
+def test_paths_match_find_path_after_changes(create_maze, change_tile, check_path):
+    maze = create_maze((31, 29), 20, 0)
+    pathfinder = IncrementalPathfinder(maze)
+    rng = random.Random(7)
+    destination = maze.get_random_loc("path", rng=rng)
+    enemy_locs = [maze.get_random_loc("path", rng=rng) for i in range(ENEMY_COUNT)]
+    for change in range(CHANGES):
+        change_tile(maze, rng)
+
+        # The player wanders around so the searches are reused with new destinations as well as repaired
+        neighbours = [loc for loc in maze.get_neighbour_locs(destination, diagonals=False) if maze.is_path(loc)]
+        if len(neighbours) == 0 or rng.random() < TELEPORT_CHANCE:
+            destination = maze.get_random_loc("path", rng=rng)
+        else:
+            destination = rng.choice(neighbours)
+
+        # The enemies take a step along each path they are given, so the next path is found from a location on the search's earlier path
+        for i, loc in enumerate(enemy_locs):
+            path = pathfinder.get_path(loc, destination)
+            check_path(maze, path, loc, destination)
+            if path == None:
+                enemy_locs[i] = maze.get_random_loc("path", rng=rng)
+            elif len(path) != 0:
+                enemy_locs[i] = path[0]
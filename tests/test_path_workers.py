@@ -0,0 +1,110 @@
+"""
+Checks that enemies are given their paths in the game's process when a batch sent to the path workers fails or stalls, and that results which arrive too late are ignored
+The worker pool is replaced with a fake pool whose batches only finish when the test finishes them
+Run from the root of the project with: python -m pytest tests
+"""
+import math
+import random
+import types
+from concurrent.futures import Future
+
+import pygame
+
+from scripts import pathfinding
+from scripts.entities import Enemy
+from scripts.pathfinding import AStar, ProcessPathScheduler, find_path
+from scripts.spatial_hash import SpatialHash
+
+# This is how many enemies are sent to the workers in each batch
+ENEMY_COUNT = 3
+# This is the path the fake workers find, which is never the real path of an enemy so the test can tell which enemies were given the result of a batch
+WORKER_PATH = [(-5, -5)]
+
+class FakePool:
+    """
+    A pool which keeps the batches sent to it as futures which have been started but never finish on their own
+    """
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, function, *args):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        pass
+
+def create_game(maze):
+    """
+    Returns just enough of a game for enemies to be given paths by a path scheduler using the fake pool, with the player standing on a random path tile
+    """
+    game = types.SimpleNamespace(maze=maze, enemies=[], killed=0, camera_displacement=(0, 0), display=pygame.Surface((426, 240)))
+    game.animations = {'red_slime': {'idle': None, 'running': None, 'death': None}}
+    game.enemy_hash = SpatialHash(maze.tile_size)
+    game.pathfinder = AStar(maze)
+    destination = maze.get_random_loc("path", rng=random.Random(1))
+    game.player = types.SimpleNamespace(get_feet_loc=lambda: destination, get_center=lambda: (destination[0] * maze.tile_size, destination[1] * maze.tile_size), get_rect=lambda: pygame.Rect(-1000, -1000, 1, 1))
+    # The budget is never spent so every enemy waiting to be given a path in the game's process is given one each frame
+    game.path_scheduler = ProcessPathScheduler(game, 1, math.inf)
+    game.path_scheduler.pool = FakePool()
+    game.path_scheduler.changes = 0
+    return game
+
+def send_batch(game):
+    """
+    Creates enemies on random path tiles and sends them to the fake pool in a batch, returning the enemies and the future of their batch
+    """
+    rng = random.Random(2)
+    enemies = [Enemy(game, game.maze.get_random_loc("path", rng=rng), (16, 16), 1, 30, 'red') for i in range(ENEMY_COUNT)]
+    game.enemies.extend(enemies)
+    for enemy in enemies:
+        game.path_scheduler.request_path(enemy)
+    game.path_scheduler.update()
+    assert all(enemy in game.path_scheduler.in_flight for enemy in enemies)
+    return enemies, game.path_scheduler.pool.futures[-1]
+
+def assert_in_process_paths(game, enemies):
+    """
+    Checks that each enemy has been given the path that find_path finds from its tile to the player
+    """
+    for enemy in enemies:
+        assert enemy.path == find_path(game.maze, game.maze.get_loc(enemy.get_center()), game.player.get_feet_loc())
+
+def test_failed_batch_falls_back_to_game_process(create_maze):
+    game = create_game(create_maze((21, 21), 0, 0))
+    enemies, future = send_batch(game)
+    future.set_exception(ValueError("worker failed"))
+    game.path_scheduler.update()
+
+    assert not game.path_scheduler.broken
+    assert len(game.path_scheduler.batches) == 0
+    assert_in_process_paths(game, enemies)
+
+def test_stalled_batch_falls_back_to_game_process_and_ignores_late_result(create_maze, monkeypatch):
+    game = create_game(create_maze((21, 21), 0, 0))
+    enemies, future = send_batch(game)
+    # Every batch is late once it has been sent
+    monkeypatch.setattr(pathfinding, "PATH_WORKER_TIMEOUT", -1)
+    game.path_scheduler.update()
+
+    # The late batch is kept as its worker is still busy with it, but its enemies are given paths in the game's process
+    assert game.path_scheduler.batches[0]['late']
+    assert_in_process_paths(game, enemies)
+
+    future.set_result([WORKER_PATH] * len(enemies))
+    game.path_scheduler.update()
+    assert len(game.path_scheduler.batches) == 0
+    assert_in_process_paths(game, enemies)
+
+def test_late_result_for_cancelled_enemy_is_ignored(create_maze):
+    game = create_game(create_maze((21, 21), 0, 0))
+    enemies, future = send_batch(game)
+    game.path_scheduler.cancel(enemies[0])
+    future.set_result([WORKER_PATH] * len(enemies))
+    game.path_scheduler.update()
+
+    assert enemies[0].path != WORKER_PATH
+    assert enemies[0] not in game.path_scheduler.requests
+    assert all(enemy.path == WORKER_PATH for enemy in enemies[1:])